@@ -0,0 +1,78 @@
+"""
+Common interface for every cache (search, resume, page, extraction, ...).
+
+Backends implement the sync methods; callers on the event loop use the
+async wrappers, which push blocking backends (disk / network) onto a worker
+thread and call in-process backends directly.
+"""
+import asyncio
+from typing import Any, Dict, Iterable, Optional
+
+
+class CacheBackend:
+    # True when calls may block on I/O (SQLite file, remote server, ...)
+    blocking = True
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any):
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any) -> bool:
+        """
+        Stores `value` only if `key` is missing (or expired); True if stored.
+        Backends shared between processes override this with an atomic
+        version, so it can be used as a lock / lease.
+        """
+        if self.get(key) is not None:
+            return False
+        self.set(key, value)
+        return True
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    # ----------------------------
+    # async wrappers
+    # ----------------------------
+    async def _call(self, fn, *args):
+        if self.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await self._call(self.get, key)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return await self._call(self.get_many, list(keys))
+
+    async def aset(self, key: str, value: Any):
+        await self._call(self.set, key, value)
+
+    async def aadd(self, key: str, value: Any) -> bool:
+        return await self._call(self.add, key, value)
+
+    async def adelete(self, key: str):
+        await self._call(self.delete, key)
+
+    async def aclear(self):
+        await self._call(self.clear)
+
+    async def astats(self) -> Dict[str, Any]:
+        stats = await self._call(self.stats)
+        return {"backend": type(self).__name__, **stats}
@@ -0,0 +1,38 @@
+"""
+Builds cache instances on the configured backend.
+
+Backend per cache, first match wins:
+  <NAME>_CACHE_BACKEND env var   e.g. SEARCH_CACHE_BACKEND=sqlite
+  CACHE_BACKEND env var          applies to every cache
+  the cache's own default        (memory for API caches, sqlite for pages)
+
+Backends:
+  memory  in-process LRUCache (each uvicorn worker has its own)
+  sqlite  SqliteCache on a file shared by all workers / processes
+"""
+import os
+
+from config import CACHE_BACKEND, SHARED_CACHE_PATH, log
+from components.cache_backend import CacheBackend
+from components.memory_cache import LRUCache
+from components.sqlite_cache import SqliteCache
+
+BACKENDS = ("memory", "sqlite")
+
+
+def make_cache(
+    name: str,
+    ttl_seconds: float,
+    max_entries: int = 0,
+    max_bytes: int = 0,
+    default_backend: str = "memory",
+    path: str = SHARED_CACHE_PATH,
+) -> CacheBackend:
+    backend = os.getenv(f"{name.upper()}_CACHE_BACKEND") or CACHE_BACKEND or default_backend
+    if backend not in BACKENDS:
+        log("UNKNOWN CACHE BACKEND", {"cache": name, "backend": backend, "using": default_backend})
+        backend = default_backend
+
+    if backend == "sqlite":
+        return SqliteCache(path=path, table=name, ttl_seconds=ttl_seconds, max_bytes=max_bytes, max_entries=max_entries)
+    return LRUCache(name, ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
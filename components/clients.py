@@ -0,0 +1,98 @@
+"""
+Shared async clients for the scraping / search providers.
+
+All Tavily and Firecrawl traffic goes through the coroutines below so that:
+  - nothing blocks the event loop (native async SDK clients)
+  - calls are throttled by the shared rate limiter
+  - queue depth / in-flight / latency metrics are tracked per provider
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Union
+
+from dotenv import load_dotenv
+from firecrawl import AsyncFirecrawl
+from tavily import AsyncTavilyClient
+
+from components.rate_limit import rate_limited
+
+load_dotenv()
+
+tavily_client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+firecrawl_client = AsyncFirecrawl(api_key=os.getenv("FIRECRAWL_API_KEY"))
+
+
+# ----------------------------
+# Metrics
+# ----------------------------
+class ProviderStats:
+    def __init__(self):
+        self.queued = 0          # waiting on the rate limiter
+        self.in_flight = 0       # request sent, response pending
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_seconds": round(self.total_seconds / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+_stats: Dict[str, ProviderStats] = {}
+
+
+@asynccontextmanager
+async def _tracked(provider: str):
+    stats = _stats.setdefault(provider, ProviderStats())
+    stats.queued += 1
+    started = False
+    try:
+        async with rate_limited(provider):
+            stats.queued -= 1
+            started = True
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            start = time.perf_counter()
+            try:
+                yield
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+                stats.calls += 1
+                stats.total_seconds += time.perf_counter() - start
+    finally:
+        # Cancelled while still waiting for a token
+        if not started:
+            stats.queued -= 1
+
+
+def io_stats() -> Dict[str, Dict[str, Any]]:
+    return {provider: stats.as_dict() for provider, stats in _stats.items()}
+
+
+# ----------------------------
+# Provider calls
+# ----------------------------
+async def tavily_search(query: str, **kwargs) -> Dict[str, Any]:
+    async with _tracked("tavily"):
+        return await tavily_client.search(query=query, **kwargs)
+
+
+async def tavily_extract(urls: Union[str, List[str]], **kwargs) -> Dict[str, Any]:
+    async with _tracked("tavily"):
+        return await tavily_client.extract(urls=urls, **kwargs)
+
+
+async def firecrawl_scrape(url: str, **kwargs) -> Any:
+    async with _tracked("firecrawl"):
+        return await firecrawl_client.scrape(url, **kwargs)
@@ -0,0 +1,144 @@
+"""
+Resumable per-query crawl state for lazy, cursor-based pagination.
+
+Instead of crawling a fixed number of jobs up front, a CrawlSession keeps:
+  - the parsed query (keywords / location)
+  - the URLs found so far and those not scraped yet
+  - how many results were requested from each source (the source offsets)
+  - the jobs structured so far
+and crawls just enough to serve the page being asked for. When the pending
+URLs run out, the sources are searched again with a larger limit and only
+URLs not seen before are added.
+"""
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from config import AppState, log, generate_job_id, STRUCTURE_CONCURRENCY, CRAWL_MAX_URLS
+from components.job_query import parse_job_query_node
+from components.search import parallel_search_node
+from components.scrap_structure import structure_urls
+
+
+class CrawlSession:
+    def __init__(self, query: str, jobs: Optional[List[Dict[str, Any]]] = None):
+        self.query = query
+        self.query_state: Optional[AppState] = None
+
+        self.search_limit = 0                      # combined limit of the last search
+        self.source_offsets: Dict[str, int] = {}   # source -> URLs found so far
+        self.seen_urls: Set[str] = set()
+        self.pending_urls: List[str] = []
+
+        self.jobs: List[Dict[str, Any]] = []
+        self.exhausted = False
+        self.updated = time.time()
+        self.lock = asyncio.Lock()
+
+        # Seed from an earlier full crawl (e.g. search_cache) so we resume
+        # after it instead of starting over
+        for job in jobs or []:
+            self._add_job(job)
+
+    async def ensure(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Crawls until at least `count` jobs are available or the sources run dry.
+        """
+        async with self.lock:
+            if self.query_state is None and len(self.jobs) < count:
+                await self._parse()
+
+            while len(self.jobs) < count and not self.exhausted:
+                if not self.pending_urls:
+                    sources_have_more = await self._search_more(count)
+                    if not self.pending_urls:
+                        if sources_have_more:
+                            continue  # everything returned was seen already: widen again
+                        self.exhausted = True
+                        break
+
+                # Scrape only what this page still needs (at least one full
+                # round of the structure pipeline's concurrency)
+                need = count - len(self.jobs)
+                batch_size = max(need, STRUCTURE_CONCURRENCY)
+                batch, self.pending_urls = self.pending_urls[:batch_size], self.pending_urls[batch_size:]
+
+                # Generous limit: every job from the batch is kept for later pages
+                try:
+                    jobs = await structure_urls(batch, limit=len(batch) * 3)
+                except asyncio.CancelledError:
+                    # Client went away mid-batch: the next ensure() scrapes it
+                    self.pending_urls = batch + self.pending_urls
+                    raise
+                for job in jobs:
+                    self._add_job(job)
+
+            self.updated = time.time()
+            log("CRAWL SESSION", self.progress())
+            return self.jobs
+
+    @property
+    def has_more(self) -> bool:
+        if self.exhausted:
+            return False
+        return bool(self.pending_urls) or self.search_limit < CRAWL_MAX_URLS
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "jobs": len(self.jobs),
+            "pending_urls": len(self.pending_urls),
+            "search_limit": self.search_limit,
+            "source_offsets": self.source_offsets,
+            "exhausted": self.exhausted,
+        }
+
+    # ----------------------------
+    # internals
+    # ----------------------------
+    async def _parse(self):
+        parsed = await parse_job_query_node({
+            "user_input": self.query,
+            "mode": "job",
+            "keywords": [],
+            "location": [],
+            "limit": None,
+        })
+        self.query_state = {
+            "user_input": self.query,
+            "keywords": parsed.get("keywords", []),
+            "location": parsed.get("location", []),
+        }
+
+    async def _search_more(self, count: int) -> bool:
+        """
+        Re-runs the source search with a larger limit and queues the URLs not
+        seen before. Returns False once the sources cannot give any more.
+        """
+        # Ask for more than needed: some URLs turn out expired or unparsable
+        target = min(CRAWL_MAX_URLS, max(self.search_limit * 2, count * 2, 4))
+        if target <= self.search_limit:
+            return False
+
+        result = await parallel_search_node({**self.query_state, "limit": target})
+        # Only after the search returned: a cancelled search is redone as is
+        self.search_limit = target
+        found = result.get("job_urls", [])
+        new_urls = [u for u in found if u not in self.seen_urls]
+        for url in new_urls:
+            source = "linkedin" if "linkedin.com" in url else "indeed"
+            self.source_offsets[source] = self.source_offsets.get(source, 0) + 1
+        self.seen_urls.update(new_urls)
+        self.pending_urls.extend(new_urls)
+        log("CRAWL SESSION SEARCH", {"limit": target, "found": len(found), "new_urls": len(new_urls)})
+
+        # Fewer results than asked for means the sources ran dry
+        return len(found) >= target and target < CRAWL_MAX_URLS
+
+    def _add_job(self, job: Dict[str, Any]):
+        url = job.get("source_url")
+        if url:
+            if any(j.get("source_url") == url for j in self.jobs):
+                return
+            self.seen_urls.add(url)
+        self.jobs.append({**job, "id": generate_job_id(url)})
@@ -0,0 +1,24 @@
+"""
+Persistent cache of LLM job extractions.
+
+Keyed by (content hash, prompt/schema version, model): re-processing a
+byte-identical page costs no LLM call, and changing the prompt, the Job
+schema or the model invalidates old entries automatically.
+"""
+import hashlib
+
+from config import EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_TTL, EXTRACTION_CACHE_MAX_BYTES
+from components.caches import make_cache
+
+extraction_cache = make_cache(
+    "extractions",
+    ttl_seconds=EXTRACTION_CACHE_TTL,
+    max_bytes=EXTRACTION_CACHE_MAX_BYTES,
+    default_backend="sqlite",
+    path=EXTRACTION_CACHE_PATH,
+)
+
+
+def extraction_key(markdown: str, version: str, model: str) -> str:
+    content_hash = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+    return f"{model}:{version}:{content_hash}"
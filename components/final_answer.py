@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from config import AppState 
+from components.rate_limit import rate_limited
 
 
 # ============================
@@ -40,7 +41,6 @@ async def final_answer_node(state: AppState) -> AppState:
     # if no jobs found
     if not jobs:
         return {
-            **state,
             "final_answer": "❌ I couldn't find any jobs for your query. Try changing keywords/location."
         }
 
@@ -62,9 +62,12 @@ TASK:
 Make the answer professional and easy to read.
 """
 
-    response = (await llm.ainvoke(prompt)).content
+    # Streamed so /chat/stream can forward tokens as they arrive
+    response = ""
+    async with rate_limited("gemini"):
+        async for chunk in llm.astream(prompt):
+            response += chunk.text
 
     return {
-        **state,
         "final_answer": response
     }
\ No newline at end of file
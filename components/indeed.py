@@ -1,32 +1,63 @@
 import os
-from typing import List
+from typing import Any, Dict, List
 from dotenv import load_dotenv
-from tavily import TavilyClient
-from config import AppState, log
+from config import AppState, log, INDEED_RAW_CONTENT, INDEED_MIN_CONTENT_CHARS
+from components.clients import tavily_search
+from components.page_cache import page_cache, canonical_url
 
 # ----------------------------
-# ENV + CLIENTS
+# ENV
 # ----------------------------
 load_dotenv()
 
-tavily_client = TavilyClient(api_key="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")
-
 # ----------------------------
 # Indeed search helper
 # ----------------------------
-def search_indeed_urls(keywords: str, location: str, limit: int = 1) -> List[str]:
+async def _remember_raw_pages(results: List[Dict[str, Any]]):
+    """
+    Stores the page content Tavily returned with the search in the page
+    cache, so the structure pipeline extracts it directly instead of
+    scraping the URL again. Missing / thin content is left out: those URLs
+    still go through Firecrawl.
+    """
+    used, thin = 0, 0
+    for r in results:
+        url = r.get("url", "")
+        content = (r.get("raw_content") or "").strip()
+        if "indeed.com" not in url:
+            continue
+        if len(content) < INDEED_MIN_CONTENT_CHARS:
+            thin += 1
+            continue
+        try:
+            await page_cache.aset(canonical_url(url), content)
+            used += 1
+        except Exception as e:
+            log("PAGE CACHE WRITE FAILED", str(e))
+    log("INDEED RAW CONTENT", {"used": used, "thin_or_missing": thin})
+
+
+async def search_indeed_urls(
+    keywords: str,
+    location: str,
+    limit: int = 1,
+    include_raw_content: bool = INDEED_RAW_CONTENT,
+) -> List[str]:
     query = f'site:in.indeed.com/viewjob "{keywords}" "{location}"'
     
     # log("INDEED SEARCHING", query) # Optional logging
 
-    res = tavily_client.search(
+    res = await tavily_search(
         query=query,
         search_depth="advanced",
         max_results=limit,
         include_answer=False,
-        include_raw_content=False,
+        include_raw_content="markdown" if include_raw_content else False,
     )
 
+    if include_raw_content:
+        await _remember_raw_pages(res.get("results", []))
+
     urls = []
     for r in res.get("results", []):
         url = r.get("url", "")
@@ -57,9 +88,8 @@ async def indeed_urls_node(state: AppState) -> AppState:
 
     # Fetch half of total limit (floor) for Indeed's share
     target = limit // 2
-    urls = search_indeed_urls(keywords, location, target)
+    urls = await search_indeed_urls(keywords, location, target)
 
     return {
-        **state,
         "job_urls": urls
     }
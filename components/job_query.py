@@ -1,10 +1,13 @@
 import os
 import sys
+from collections import Counter
 from typing import List
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
-from config import AppState, log
+from config import AppState, log, QUERY_PARSER_CONFIDENCE
+from components.rate_limit import rate_limited
+from components.query_parser import parse_job_query_local
 
 # Load env if not loaded
 load_dotenv()
@@ -25,6 +28,18 @@ class JobQuery(BaseModel):
     limit: int = 4
 
 
+_parse_stats: Counter = Counter()
+
+
+def query_parser_stats() -> dict:
+    """How often the local parser answered vs the LLM fallback."""
+    total = _parse_stats["local"] + _parse_stats["llm"]
+    return {
+        **_parse_stats,
+        "fast_path_rate": round(_parse_stats["local"] / total, 3) if total else 0.0,
+    }
+
+
 # ----------------------------
 # NODE: parse keywords/location from user_input
 # ----------------------------
@@ -32,9 +47,25 @@ async def parse_job_query_node(state: AppState) -> AppState:
     user_input = state["user_input"]
     log("JOB QUERY PARSING", user_input)
 
+    # Fast path: deterministic parser, no tokens spent
+    local = parse_job_query_local(user_input)
+    if local.confidence >= QUERY_PARSER_CONFIDENCE:
+        _parse_stats["local"] += 1
+        limit = local.limit or state.get("limit") or 5
+        log("JOB QUERY PARSED (local)", {**local.__dict__, "limit": limit, "stats": query_parser_stats()})
+        return {
+            "keywords": local.keywords,
+            "location": local.location,
+            "limit": limit,
+        }
+
+    _parse_stats["llm"] += 1
+    log("JOB QUERY LOCAL PARSE LOW CONFIDENCE", {**local.__dict__, "stats": query_parser_stats()})
+
     parser_llm = llm.with_structured_output(JobQuery)
 
-    parsed: JobQuery = await parser_llm.ainvoke(
+    async with rate_limited("gemini"):
+        parsed: JobQuery = await parser_llm.ainvoke(
         f"""
 Extract job search query from the message.
 
@@ -46,12 +77,11 @@ Return:
 Message:
 {user_input}
 """
-    )
+        )
     
     log("JOB QUERY PARSED", parsed.dict())
 
     return {
-        **state,
         "keywords": parsed.keywords,
         "location": parsed.location,
         "limit": parsed.limit,
@@ -6,6 +6,7 @@ from langchain_core.messages import HumanMessage, SystemMessage,BaseMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from components.mcp_server import get_mcp_cache, SERVERS
 from config import AppState, log
+from components.rate_limit import rate_limited
 from langchain_core.messages import ToolMessage, AIMessage, BaseMessage
 import json
 import traceback
@@ -71,7 +72,7 @@ async def mcp_agent_node(state: AppState) -> AppState:
     except Exception as e:
         log("MCP TOOLS LOAD FAILED", str(e))
         # traceback.print_exc()
-        return {**state, "job_urls": []}
+        return {"job_urls": []}
 
     job_urls = []
 
@@ -85,7 +86,8 @@ async def mcp_agent_node(state: AppState) -> AppState:
         
         try:
             # Invoke tool
-            raw = await tool.ainvoke(tool_args)
+            async with rate_limited("linkedin_mcp"):
+                raw = await tool.ainvoke(tool_args)
             parsed = normalize_mcp_result(raw)
             log("MCP TOOL RESULT", parsed)
             
@@ -106,4 +108,4 @@ async def mcp_agent_node(state: AppState) -> AppState:
 
     log("LINKEDIN URLS FOUND", job_urls)
 
-    return {**state, "job_urls": job_urls}
+    return {"job_urls": job_urls}
@@ -0,0 +1,49 @@
+"""
+Persistent cache of scraped job pages (markdown), keyed by canonical URL.
+"""
+import re
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from config import PAGE_CACHE_PATH, PAGE_CACHE_TTL, PAGE_CACHE_MAX_BYTES
+from components.caches import make_cache
+
+page_cache = make_cache(
+    "pages",
+    ttl_seconds=PAGE_CACHE_TTL,
+    max_bytes=PAGE_CACHE_MAX_BYTES,
+    default_backend="sqlite",
+    path=PAGE_CACHE_PATH,
+)
+
+_LINKEDIN_JOB_ID = re.compile(r"/jobs/view/(?:[^/]*-)?(\d+)")
+_TRACKING_PARAMS = ("utm_", "ref", "trk", "tracking", "from", "src", "vjs", "advn", "adid")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Maps the many spellings of one posting to a single key:
+      https://in.linkedin.com/jobs/view/ml-engineer-at-acme-4012345678?trk=x
+      https://www.linkedin.com/jobs/view/4012345678/
+        -> linkedin.com/jobs/view/4012345678
+      https://in.indeed.com/viewjob?jk=abc123&from=serp
+        -> in.indeed.com/viewjob?jk=abc123
+    """
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    if host.endswith("linkedin.com"):
+        match = _LINKEDIN_JOB_ID.search(parts.path)
+        if match:
+            return f"linkedin.com/jobs/view/{match.group(1)}"
+
+    params = parse_qsl(parts.query, keep_blank_values=False)
+    if "indeed." in host:
+        params = [(k, v) for k, v in params if k == "jk"]
+    else:
+        params = [(k, v) for k, v in params if not k.lower().startswith(_TRACKING_PARAMS)]
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(params))
+    return f"{host}{path}" + (f"?{query}" if query else "")
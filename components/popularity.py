@@ -0,0 +1,58 @@
+"""
+Query popularity tracker used to pick which searches to refresh proactively.
+
+Each query key has a score that gains 1 per request and halves every
+`half_life` seconds, so "popular" means popular recently. Pinned keys (e.g.
+the /jobs/initial default) always count as hot.
+"""
+import time
+from typing import Dict, List, Tuple
+
+
+class PopularityTracker:
+    def __init__(self, half_life: float, max_keys: int = 1000):
+        self.half_life = half_life
+        self.max_keys = max_keys
+        # key -> (score, updated_at, query text)
+        self._scores: Dict[str, Tuple[float, float, str]] = {}
+        self._pinned: Dict[str, str] = {}
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        if self.half_life <= 0:
+            return score
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def hit(self, key: str, query: str):
+        now = time.time()
+        score, updated_at, _ = self._scores.get(key, (0.0, now, query))
+        self._scores[key] = (self._decayed(score, updated_at, now) + 1, now, query)
+
+        if len(self._scores) > self.max_keys:
+            coldest = min(self._scores, key=lambda k: self._decayed(*self._scores[k][:2], now))
+            del self._scores[coldest]
+
+    def pin(self, key: str, query: str):
+        self._pinned[key] = query
+
+    def top(self, n: int) -> List[Tuple[str, str]]:
+        """
+        Pinned keys first, then the `n` highest scoring ones: [(key, query), ...]
+        """
+        now = time.time()
+        ranked = sorted(
+            (k for k in self._scores if k not in self._pinned),
+            key=lambda k: self._decayed(*self._scores[k][:2], now),
+            reverse=True,
+        )
+        return list(self._pinned.items()) + [(k, self._scores[k][2]) for k in ranked[:n]]
+
+    def stats(self, n: int = 10) -> Dict[str, object]:
+        now = time.time()
+        return {
+            "tracked": len(self._scores),
+            "pinned": list(self._pinned),
+            "top": [
+                {"key": k, "score": round(self._decayed(*self._scores[k][:2], now), 2)}
+                for k, _ in self.top(n) if k in self._scores
+            ],
+        }
@@ -0,0 +1,116 @@
+"""
+Canonical cache keys for job searches.
+
+Different spellings of the same search should share one cache entry:
+  "ML engineer jobs Hyderabad"
+  "machine learning engineer in hyderabad"
+    -> "job|kw=machine learning engineer|loc=hyderabad"
+
+The text is parsed with the local query parser, then:
+  - keywords are lowercased, synonym folded ("ml" -> "machine learning",
+    "sr" -> "senior", "nodejs" -> "node.js", ...) and sorted
+  - locations use the gazetteer's canonical names, sorted
+  - an explicit limit ("give 5") is bucketed to 5 / 10 / 20
+Only text the parser fully accounted for is folded. Queries it is not
+confident about, where it ignored any content word ("at google",
+"not in mumbai"), or that contain a number other than the limit
+("sde 2", "sde-3"), keep the old key (stripped, lowercased text with
+whitespace collapsed), so two different searches never share an entry.
+"""
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+from config import QUERY_PARSER_CONFIDENCE
+from components.query_parser import parse_job_query_local, _NUMBER_WORDS
+
+# Multi-word phrases first, matched on whole words
+_PHRASE_SYNONYMS = {
+    "gen ai": "generative ai",
+    "genai": "generative ai",
+    "artificial intelligence": "ai",
+    "cyber security": "cybersecurity",
+    "front end": "frontend",
+    "back end": "backend",
+    "fullstack": "full stack",
+    "site reliability engineer": "sre",
+    "site reliability": "sre",
+    "software development engineer": "sde",
+    "entry level": "junior",
+    "react native": "react-native",
+    "spring boot": "spring-boot",
+    "ui/ux": "ui ux",
+}
+_WORD_SYNONYMS = {
+    "ml": "machine learning",
+    "sr": "senior",
+    "jr": "junior",
+    "fresher": "junior",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "dotnet": ".net",
+    "golang": "go",
+    "internship": "intern",
+    "programmer": "developer",
+    "tester": "qa engineer",
+    "testing": "qa",
+}
+
+_key_stats: Counter = Counter()
+
+
+def _fold(keyword: str) -> str:
+    text = keyword.lower().strip()
+    for phrase, canonical in sorted(_PHRASE_SYNONYMS.items(), key=lambda kv: len(kv[0]), reverse=True):
+        text = re.sub(rf"(?<![\w.]){re.escape(phrase)}(?![\w])", canonical, text)
+    words = [_WORD_SYNONYMS.get(w, w) for w in text.split()]
+    # Folding can repeat words ("tester engineer" -> "qa engineer engineer")
+    return " ".join(dict.fromkeys(" ".join(words).split()))
+
+
+def _limit_bucket(limit: Optional[int]) -> Optional[int]:
+    if not limit:
+        return None
+    for bucket in (5, 10, 20):
+        if limit <= bucket:
+            return bucket
+    return 20
+
+
+_NUMBER_RE = re.compile(rf"(?<![a-z])(\d+|{'|'.join(re.escape(w) for w in _NUMBER_WORDS)})(?![a-z\d])")
+
+
+def _dropped_number(raw: str, limit: Optional[int]) -> bool:
+    # A level or count the key would not carry ("sde 2" vs "sde 3")
+    for m in _NUMBER_RE.finditer(raw):
+        value = int(m.group(1)) if m.group(1).isdigit() else _NUMBER_WORDS[m.group(1)]
+        if value != limit:
+            return True
+    return False
+
+
+def canonical_query_key(query: str) -> str:
+    raw = re.sub(r"\s+", " ", (query or "").strip().lower())
+
+    parsed = parse_job_query_local(query)
+    if (
+        not parsed.keywords
+        or parsed.leftover
+        or parsed.confidence < QUERY_PARSER_CONFIDENCE
+        or _dropped_number(raw, parsed.limit)
+    ):
+        _key_stats["raw"] += 1
+        return raw
+
+    _key_stats["canonical"] += 1
+    keywords = sorted(set(_fold(k) for k in parsed.keywords))
+    location = sorted(set(l.lower() for l in parsed.location))
+    key = f"job|kw={','.join(keywords)}|loc={','.join(location)}"
+    bucket = _limit_bucket(parsed.limit)
+    if bucket:
+        key += f"|n={bucket}"
+    return key
+
+
+def query_key_stats() -> Dict[str, int]:
+    return dict(_key_stats)
@@ -0,0 +1,257 @@
+"""
+Deterministic job-query parser (no LLM).
+
+Pulls keywords / location / limit out of text like
+"ML engineer jobs in Hyderabad, give 5" using:
+  - a gazetteer of Indian cities and states (with common aliases)
+  - a job-title lexicon (domain words + role nouns)
+  - number extraction ("give 5", "top ten", "5 jobs")
+and reports how confident it is, so callers can fall back to the LLM.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# ----------------------------
+# Gazetteer: alias -> canonical name
+# ----------------------------
+_CITIES = {
+    "bangalore": "Bangalore", "bengaluru": "Bangalore", "blr": "Bangalore",
+    "hyderabad": "Hyderabad", "hyd": "Hyderabad", "secunderabad": "Hyderabad",
+    "mumbai": "Mumbai", "bombay": "Mumbai", "navi mumbai": "Navi Mumbai", "thane": "Thane",
+    "delhi": "Delhi", "new delhi": "Delhi", "ncr": "Delhi NCR", "delhi ncr": "Delhi NCR",
+    "gurgaon": "Gurugram", "gurugram": "Gurugram", "noida": "Noida", "greater noida": "Noida",
+    "ghaziabad": "Ghaziabad", "faridabad": "Faridabad",
+    "chennai": "Chennai", "madras": "Chennai",
+    "pune": "Pune", "kolkata": "Kolkata", "calcutta": "Kolkata",
+    "ahmedabad": "Ahmedabad", "gandhinagar": "Gandhinagar", "surat": "Surat", "vadodara": "Vadodara",
+    "jaipur": "Jaipur", "lucknow": "Lucknow", "kanpur": "Kanpur", "indore": "Indore", "bhopal": "Bhopal",
+    "chandigarh": "Chandigarh", "mohali": "Mohali", "nagpur": "Nagpur", "nashik": "Nashik",
+    "kochi": "Kochi", "cochin": "Kochi", "trivandrum": "Thiruvananthapuram",
+    "thiruvananthapuram": "Thiruvananthapuram", "coimbatore": "Coimbatore", "madurai": "Madurai",
+    "mysore": "Mysuru", "mysuru": "Mysuru", "mangalore": "Mangaluru", "mangaluru": "Mangaluru",
+    "visakhapatnam": "Visakhapatnam", "vizag": "Visakhapatnam", "vijayawada": "Vijayawada",
+    "warangal": "Warangal", "bhubaneswar": "Bhubaneswar", "patna": "Patna", "ranchi": "Ranchi",
+    "guwahati": "Guwahati", "dehradun": "Dehradun", "goa": "Goa",
+}
+_STATES = {
+    "andhra pradesh": "Andhra Pradesh", "ap": "Andhra Pradesh",
+    "telangana": "Telangana", "karnataka": "Karnataka", "tamil nadu": "Tamil Nadu", "tn": "Tamil Nadu",
+    "kerala": "Kerala", "maharashtra": "Maharashtra", "gujarat": "Gujarat", "rajasthan": "Rajasthan",
+    "uttar pradesh": "Uttar Pradesh", "up": "Uttar Pradesh", "madhya pradesh": "Madhya Pradesh",
+    "mp": "Madhya Pradesh", "west bengal": "West Bengal", "odisha": "Odisha", "orissa": "Odisha",
+    "bihar": "Bihar", "jharkhand": "Jharkhand", "assam": "Assam", "punjab": "Punjab",
+    "haryana": "Haryana", "uttarakhand": "Uttarakhand", "himachal pradesh": "Himachal Pradesh",
+    "chhattisgarh": "Chhattisgarh", "india": "India", "remote": "Remote",
+}
+# Short aliases only count after "in"/"at" ("jobs in up"), never as plain words
+_AMBIGUOUS_PLACES = {"ap", "tn", "up", "mp", "hyd", "blr", "ncr"}
+GAZETTEER: Dict[str, str] = {**_CITIES, **_STATES}
+
+# ----------------------------
+# Job-title lexicon
+# ----------------------------
+_DOMAIN_WORDS = [
+    "machine learning", "deep learning", "artificial intelligence", "generative ai", "gen ai", "genai",
+    "ml", "ai", "nlp", "computer vision", "llm", "data", "big data", "software", "backend", "back end",
+    "frontend", "front end", "full stack", "fullstack", "web", "mobile", "android", "ios", "flutter",
+    "react", "react native", "angular", "node", "nodejs", "node.js", "python", "java", "javascript",
+    "typescript", "golang", "go", "c++", "php", ".net", "dotnet", "django", "spring boot", "sql",
+    "devops", "cloud", "aws", "azure", "gcp", "site reliability", "sre", "platform", "infrastructure",
+    "qa", "test", "testing", "automation", "manual testing", "performance", "selenium",
+    "ui", "ux", "ui/ux", "graphic", "product", "project", "program", "business", "financial",
+    "marketing", "digital marketing", "sales", "hr", "content", "cyber security", "cybersecurity",
+    "security", "network", "embedded", "firmware", "hardware", "blockchain", "game", "salesforce",
+    "sap", "power bi", "tableau", "etl", "research", "mlops", "robotics",
+]
+_SENIORITY = ["senior", "sr", "junior", "jr", "lead", "principal", "staff", "associate", "trainee", "entry level", "fresher"]
+_ROLE_NOUNS = [
+    "engineer", "engineering", "developer", "development", "scientist", "analyst", "designer",
+    "intern", "internship", "manager", "architect", "tester", "consultant", "administrator", "admin",
+    "specialist", "researcher", "programmer", "executive", "associate", "lead", "sde", "sdet",
+]
+_STANDALONE_TITLES = ["sde", "sdet", "sre", "data scientist", "data analyst", "product manager"]
+
+_ACRONYMS = {"ml", "ai", "nlp", "llm", "qa", "ui", "ux", "ui/ux", "sde", "sdet", "sre", "aws", "gcp",
+             "hr", "sql", "etl", "sap", "ios", "php", "mlops", "genai", "gen ai", "bi", "c++"}
+_SPECIAL_CASE = {"devops": "DevOps", "nodejs": "NodeJS", "node.js": "Node.js", "javascript": "JavaScript",
+                 "typescript": "TypeScript", ".net": ".NET", "dotnet": ".NET", "fullstack": "Full Stack",
+                 "golang": "Golang", "power bi": "Power BI", "ui/ux": "UI/UX", "sr": "Senior", "jr": "Junior"}
+
+
+def _alternation(words: List[str]) -> str:
+    # Longest first so "machine learning" wins over "learning"
+    return "|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+
+_MODIFIER = rf"(?:{_alternation(_SENIORITY + _DOMAIN_WORDS)})"
+_TITLE_RE = re.compile(
+    rf"(?<![\w+#.])((?:{_MODIFIER}[\s/-]+){{0,3}}(?:{_alternation(_ROLE_NOUNS)})s?)(?![\w+#])"
+    rf"|(?<![\w+#.])({_alternation(_STANDALONE_TITLES)})(?![\w+#])"
+)
+# "python jobs", "react internships", "data roles" -> domain words without a role noun
+_DOMAIN_JOBS_RE = re.compile(
+    rf"(?<![\w+#.])((?:{_MODIFIER}[\s/-]+){{0,2}}{_MODIFIER})\s+(?:jobs?|roles?|openings?|positions?|vacancies|internships?)\b"
+)
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "a couple": 2, "a few": 3,
+}
+_NUM = rf"(\d{{1,2}}|{_alternation(list(_NUMBER_WORDS))})"
+_LIMIT_RES = [
+    re.compile(rf"\b(?:give|show|find|get|fetch|list|top|first|need|want)\s+(?:me\s+)?(?:the\s+)?(?:top\s+)?{_NUM}\b"),
+    re.compile(rf"(?<!sde )(?<!sde-)\b{_NUM}\s+(?:\w+\s+){{0,3}}?(?:jobs?|roles?|openings?|positions?|internships?|results?|listings?)\b"),
+    re.compile(rf"\blimit\s*(?:to|of|=|:)?\s*{_NUM}\b"),
+]
+MAX_LIMIT = 20
+
+_NEGATION_RE = re.compile(
+    r"\b(?:not|except|excluding|exclude|outside(?:\s+of)?|other\s+than|apart\s+from|but\s+not)\b"
+    r"(?:\s+(?:in|at|near|from))?\s+[a-z]"
+)
+
+# Words that carry no query information
+_FILLER = set("""
+a an the i im i'm am is are me my we us our you your please pls plz can could would will
+want need looking look search searching find finding show give get fetch list top first some any
+job jobs role roles opening openings position positions vacancy vacancies opportunity opportunities
+career careers work working hiring posting postings listing listings result results for in at on
+of to with from near around based and or also only just new latest recent good best available
+apply site interested like help
+""".split())
+
+
+@dataclass
+class LocalQuery:
+    keywords: List[str] = field(default_factory=list)
+    location: List[str] = field(default_factory=list)
+    limit: Optional[int] = None
+    confidence: float = 0.0
+    leftover: List[str] = field(default_factory=list)  # content words the parse ignored
+
+
+def _display(phrase: str) -> str:
+    words = []
+    for w in re.split(r"(\s+)", phrase.strip()):
+        if not w.strip():
+            words.append(" ")
+            continue
+        if w in _SPECIAL_CASE:
+            words.append(_SPECIAL_CASE[w])
+        elif w in _ACRONYMS:
+            words.append(w.upper())
+        else:
+            words.append(w.capitalize())
+    text = "".join(words)
+    for phrase_lower, display in _SPECIAL_CASE.items():
+        if " " in phrase_lower and phrase_lower in phrase:
+            text = re.sub(re.escape(phrase_lower), display, text, flags=re.IGNORECASE)
+    return re.sub(r"\s+", " ", text)
+
+
+def _singular(phrase: str) -> str:
+    # "ml engineers" -> "ml engineer"
+    words = phrase.split()
+    if words[-1].endswith("s") and words[-1][:-1] in _ROLE_NOUNS:
+        words[-1] = words[-1][:-1]
+    return " ".join(words)
+
+
+def _extract_locations(text: str):
+    spans = []
+    for alias in sorted(GAZETTEER, key=len, reverse=True):
+        if alias in _AMBIGUOUS_PLACES:
+            pattern = rf"\b(?:in|at|near|from)\s+({re.escape(alias)})\b"
+        else:
+            pattern = rf"(?<![\w-])({re.escape(alias)})(?![\w-])"
+        for m in re.finditer(pattern, text):
+            start, end = m.span(1)
+            if any(s <= start < e for s, e, _ in spans):
+                continue
+            spans.append((start, end, GAZETTEER[alias]))
+
+    # Keep the order the user wrote them in
+    spans.sort()
+    found = list(dict.fromkeys(canonical for _, _, canonical in spans))
+    return found, [(s, e) for s, e, _ in spans]
+
+
+def _extract_limit(text: str):
+    for pattern in _LIMIT_RES:
+        m = pattern.search(text)
+        if m:
+            raw = m.group(1)
+            value = int(raw) if raw.isdigit() else _NUMBER_WORDS[raw]
+            if 0 < value:
+                return min(value, MAX_LIMIT), m.span(1)
+    return None, None
+
+
+def parse_job_query_local(text: str) -> LocalQuery:
+    """
+    Parses a job query without any LLM call.
+
+    confidence (0..1):
+      0.6  a job title / domain phrase was recognised
+      0.25 every "in <place>" phrase resolved through the gazetteer
+           (and no place is negated: "not in mumbai", "except pune")
+      0.15 when every content word is explained
+      -0.3 per content word the parse ignores ("at google", "pytorch"),
+           including numbers not used as the limit ("sde 2", "sde-2"),
+           so a single dropped word falls below QUERY_PARSER_CONFIDENCE
+    """
+    text = (text or "").lower()
+    text = re.sub(r"[^\w\s+#./-]", " ", text)
+
+    location, loc_spans = _extract_locations(text)
+    limit, limit_span = _extract_limit(text)
+
+    keywords: List[str] = []
+    title_spans = []
+    for m in _TITLE_RE.finditer(text):
+        phrase = (m.group(1) or m.group(2)).strip()
+        if phrase.rstrip("s") in ("lead", "associate", "development", "engineering", "admin"):
+            # Too generic on their own
+            continue
+        title_spans.append(m.span())
+        keywords.append(_display(_singular(phrase)))
+    for m in _DOMAIN_JOBS_RE.finditer(text):
+        if any(s <= m.start(1) < e for s, e in title_spans):
+            continue
+        title_spans.append(m.span(1))
+        keywords.append(_display(m.group(1)))
+    keywords = list(dict.fromkeys(keywords))
+
+    # Words the parse does not account for. Split on "-" and "/" too, so the
+    # level in "sde-2" is not hidden inside the title's token.
+    covered = [s for s in loc_spans + title_spans if s] + ([limit_span] if limit_span else [])
+    leftover = []
+    for m in re.finditer(r"[\w+#.]+", text):
+        if any(s <= m.start() < e for s, e in covered):
+            continue
+        word = m.group(0).strip(".")
+        if word and word not in _FILLER:
+            leftover.append(word)
+
+    unresolved_place = bool(re.search(r"\b(?:in|at|near)\s+(?!the\b|a\b|an\b)([a-z]+)", text)) and not location
+    # The gazetteer only knows places to include, not places to exclude
+    negated_place = bool(_NEGATION_RE.search(text))
+
+    confidence = 0.0
+    if keywords:
+        confidence += 0.6
+    if not unresolved_place and not negated_place:
+        confidence += 0.25
+    if not leftover:
+        confidence += 0.15
+    confidence = max(0.0, confidence - 0.3 * len(leftover))
+
+    return LocalQuery(
+        keywords=keywords,
+        location=location,
+        limit=limit,
+        confidence=round(confidence, 3),
+        leftover=leftover,
+    )
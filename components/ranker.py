@@ -0,0 +1,151 @@
+"""
+Local job ranker (no LLM).
+
+Scores every job against a candidate profile with:
+  - skill overlap: share of the job's skills_required the candidate has
+    (from tech_skills, or named anywhere in the resume / experience text)
+  - BM25 of the profile text against job title + skills + summary
+and writes a short template match_reason, so ranking never waits on an
+LLM. server.py can replace the reasons of the visible page with LLM ones.
+
+Only the skill part (and the reason) is independent of the other jobs: BM25
+IDF and average length come from the list being ranked, so the same job
+scores differently against two lists. Callers may cache skill_scores() per
+(profile, job), but must recompute text_scores() over the list they sort.
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+SKILL_WEIGHT = 0.6
+TEXT_WEIGHT = 0.4
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_HALF = 4.0  # BM25 value that maps to a text score of 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = set("""
+a an the and or of to in on at for with by from as is are was were be been have has had
+i me my we our you your it its this that these those will would can could should
+experience years year work worked working role job team using used use
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = (t.rstrip(".") for t in _TOKEN_RE.findall((text or "").lower()))
+    return [t for t in tokens if t and t not in _STOPWORDS]
+
+
+def normalize_skill(skill: str) -> str:
+    return re.sub(r"\s+", " ", (skill or "").strip().lower())
+
+
+def _job_text(job: Dict[str, Any]) -> str:
+    return " ".join([
+        job.get("job_title") or "",
+        " ".join(job.get("skills_required") or []),
+        job.get("summary") or "",
+    ])
+
+
+def _mentions(text: str, phrase: str) -> bool:
+    return bool(re.search(rf"(?<![\w+#]){re.escape(phrase)}(?![\w+#])", text))
+
+
+def _bm25_scores(docs: List[List[str]], query: Set[str], corpus: List[List[str]]) -> List[float]:
+    n = len(corpus)
+    avg_len = sum(len(d) for d in corpus) / n or 1.0
+    df = Counter(t for d in corpus for t in set(d))
+
+    scores = []
+    for doc in docs:
+        tf = Counter(doc)
+        score = 0.0
+        for term in query:
+            if term not in tf:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf[term] + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_len)
+            score += idf * tf[term] * (BM25_K1 + 1) / norm
+        scores.append(score)
+    return scores
+
+
+def _reason(matched: List[str], terms: List[str]) -> str:
+    if matched:
+        return f"Matches your {', '.join(matched[:3])} skills."
+    if terms:
+        return f"Mentions {', '.join(terms[:3])} from your profile."
+    return "Standard match."
+
+
+def _profile(skills: Optional[List[str]], profile_text: str):
+    text = (profile_text or "").lower()
+    profile_skills = {normalize_skill(s) for s in skills or [] if normalize_skill(s)}
+    query_terms = set(tokenize(text)) | {t for s in profile_skills for t in tokenize(s)}
+    return text, profile_skills, query_terms
+
+
+def skill_scores(
+    jobs: List[Dict[str, Any]],
+    skills: Optional[List[str]] = None,
+    profile_text: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    Corpus-independent part, per job in input order:
+    [{"skill_score": 0..1, "reason": str}, ...]
+    """
+    text, profile_skills, query_terms = _profile(skills, profile_text)
+
+    results = []
+    for job in jobs:
+        job_skills = [s for s in job.get("skills_required") or [] if normalize_skill(s)]
+        matched = [
+            s for s in job_skills
+            if normalize_skill(s) in profile_skills or (text and _mentions(text, normalize_skill(s)))
+        ]
+        overlap = len(matched) / len(job_skills) if job_skills else 0.0
+        terms = [t for t in dict.fromkeys(tokenize(_job_text(job))) if t in query_terms]
+        results.append({"skill_score": round(overlap, 4), "reason": _reason(matched, terms)})
+    return results
+
+
+def text_scores(
+    jobs: List[Dict[str, Any]],
+    skills: Optional[List[str]] = None,
+    profile_text: str = "",
+) -> List[float]:
+    """
+    BM25 of the profile against each job, with `jobs` as the corpus,
+    squashed to 0..1. Only comparable within the same `jobs` list.
+    """
+    if not jobs:
+        return []
+    _, _, query_terms = _profile(skills, profile_text)
+    docs = [tokenize(_job_text(job)) for job in jobs]
+    return [bm25 / (bm25 + BM25_HALF) for bm25 in _bm25_scores(docs, query_terms, docs)]
+
+
+def combined_score(skill_score: float, text_score: float) -> float:
+    return round(SKILL_WEIGHT * skill_score + TEXT_WEIGHT * text_score, 4)
+
+
+def score_jobs(
+    jobs: List[Dict[str, Any]],
+    skills: Optional[List[str]] = None,
+    profile_text: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    Scores each job against the others in `jobs`:
+    [{"score": 0..1, "skill_score": 0..1, "reason": str}, ...] in input order.
+    """
+    return [
+        {**part, "score": combined_score(part["skill_score"], text)}
+        for part, text in zip(skill_scores(jobs, skills, profile_text), text_scores(jobs, skills, profile_text))
+    ]
+
+
+def sort_by_score(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # sorted() is stable: equal scores keep the search order
+    return sorted(jobs, key=lambda job: -job.get("match_score", 0.0))
@@ -0,0 +1,108 @@
+"""
+Async token-bucket rate limiting, shared per provider / domain.
+
+Usage:
+    async with rate_limited("firecrawl"):
+        ...
+
+Waiting happens with asyncio.sleep, so a throttled call only delays itself
+and never blocks the event loop.
+"""
+import os
+import re
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from config import RATE_LIMITS, log
+
+
+class TokenBucket:
+    """
+    `rate` tokens are added per second up to `capacity` (the burst size).
+    A rate <= 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters FIFO: whoever is first in line sleeps until
+        # enough tokens have dripped in, everybody else queues behind it.
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                self.waits += 1
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= tokens
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def _parse_limit(raw: str) -> Optional[Tuple[float, float]]:
+    # "rate,burst" e.g. "0.5,2" -> 1 call / 2s, bursts of 2
+    try:
+        rate, _, burst = raw.partition(",")
+        return float(rate), float(burst or 1)
+    except ValueError:
+        log("INVALID RATE LIMIT", raw)
+        return None
+
+
+def _limit_for(name: str) -> Optional[Tuple[float, float]]:
+    env_name = "RATE_LIMIT_" + re.sub(r"[^A-Za-z0-9]", "_", name).upper()
+    raw = os.getenv(env_name)
+    if raw:
+        return _parse_limit(raw)
+    return RATE_LIMITS.get(name)
+
+
+def get_limiter(name: str) -> Optional[TokenBucket]:
+    """
+    Returns the shared bucket for a provider / domain, or None when the name
+    has no configured limit.
+    """
+    if name not in _buckets:
+        limit = _limit_for(name)
+        if limit is None:
+            return None
+        _buckets[name] = TokenBucket(*limit)
+    return _buckets[name]
+
+
+@asynccontextmanager
+async def rate_limited(name: str):
+    bucket = get_limiter(name)
+    if bucket is not None:
+        await bucket.acquire()
+    yield
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, float]]:
+    return {name: bucket.stats() for name, bucket in _buckets.items()}
@@ -2,10 +2,14 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import re
+from collections import Counter
 from dotenv import load_dotenv
-from config import AppState, log
-from typing import Literal
-from pydantic import BaseModel
+from config import AppState, log, ROUTER_CONFIDENCE, QUERY_PARSER_CONFIDENCE
+from components.rate_limit import rate_limited
+from components.query_parser import parse_job_query_local, GAZETTEER
+from typing import List, Literal, Tuple
+from pydantic import BaseModel, Field
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Load environment variables
@@ -17,20 +21,108 @@ load_dotenv()
 class RouteDecision(BaseModel):
     mode: Literal["job", "normal"]
 
+
+class IntentQuery(BaseModel):
+    """Routing decision and job query in one structured output."""
+    mode: Literal["job", "normal"]
+    keywords: List[str] = Field(default_factory=list)
+    location: List[str] = Field(default_factory=list)
+    limit: int = 5
+
 # Gemini LLM
-router_llm = ChatGoogleGenerativeAI(
+_router_base_llm = ChatGoogleGenerativeAI(
     model="gemini-2.5-flash",
     temperature=0.2,
     google_api_key=os.getenv("GOOGLE_API_KEY_3")
-).with_structured_output(RouteDecision)
+)
+router_llm = _router_base_llm.with_structured_output(RouteDecision)
+intent_query_llm = _router_base_llm.with_structured_output(IntentQuery)
+
+# -----------------------
+# Local intent classifier (no LLM)
+# -----------------------
+# (pattern, weight) - weights add up per side, see classify_intent()
+_JOB_SIGNALS = [
+    (r"\bjobs?\b", 0.6),
+    (r"\binternships?\b", 0.6),
+    (r"\b(hiring|openings?|vacanc(y|ies)|job postings?)\b", 0.5),
+    (r"\b(looking for|searching for|find|search)\b.*\b(role|roles|position|positions|opportunit(y|ies)|work)\b", 0.5),
+    (r"\b(resume|cv|apply|applying)\b", 0.3),
+    (r"\b(engineer|developer|analyst|designer|intern|scientist|manager|architect|tester|consultant)s?\b", 0.3),
+    (r"\b(salary|stipend|ctc|lpa|fresher|freshers|work from home|wfh)\b", 0.3),
+    (r"\b(linkedin|indeed|naukri|glassdoor)\b", 0.3),
+    # "... in pune", "... at bangalore": a job search usually names a place
+    (r"\b(in|at|near)\s+(" + "|".join(re.escape(p) for p in sorted(GAZETTEER, key=len, reverse=True)) + r")\b", 0.3),
+]
+# A single job signal is never conclusive ("I lost my job today",
+# "how many jobs did AI replace"): below this many hits the local verdict
+# is capped under any sensible ROUTER_CONFIDENCE and the LLM decides.
+_MIN_JOB_SIGNALS = 2
+_SINGLE_SIGNAL_CAP = 0.5
+_NORMAL_SIGNALS = [
+    (r"^\s*(hi|hello|hey|hii+|good (morning|afternoon|evening)|thanks|thank you|ok|okay|bye)\b", 0.6),
+    (r"\b(what is|what are|what's|explain|define|meaning of|difference between|tell me about|who is|why)\b", 0.4),
+    (r"\b(how (do|does|can|to|are)|help me (understand|learn))\b", 0.3),
+    (r"\b(write|poem|story|joke|translate|summari[sz]e|code|debug)\b", 0.3),
+]
+
+_route_stats: Counter = Counter()
+
+
+def classify_intent(text: str) -> Tuple[Literal["job", "normal"], float]:
+    """
+    Keyword/regex intent scoring. Returns (mode, confidence in [0, 1]).
+    Confidence is the score margin between the two sides, so a message that
+    hits both job and normal signals comes out ambiguous. "job" needs at
+    least _MIN_JOB_SIGNALS independent hits to be confident.
+    """
+    text = (text or "").lower()
+    job_hits = [w for pattern, w in _JOB_SIGNALS if re.search(pattern, text)]
+    job = sum(job_hits)
+    normal = sum(w for pattern, w in _NORMAL_SIGNALS if re.search(pattern, text))
+
+    mode = "job" if job > normal else "normal"
+    confidence = abs(job - normal) / max(job + normal, 1.0)
+    if mode == "job" and len(job_hits) < _MIN_JOB_SIGNALS:
+        confidence = min(confidence, _SINGLE_SIGNAL_CAP)
+    return mode, round(min(confidence, 1.0), 3)
+
+
+def router_stats() -> dict:
+    """How many routing decisions each tier made (explicit / local / llm)."""
+    return dict(_route_stats)
+
 
 # -----------------------
 # LangGraph Router Node
 # -----------------------
 async def route_node(state: AppState) -> AppState:
+    """
+    Tiered routing:
+      1) mode "job" given by the caller       -> honored as-is
+      2) local classifier confident enough   -> no LLM call
+      3) otherwise                           -> Gemini structured output
+    """
     user_input = state["user_input"]
 
-    decision: RouteDecision = await router_llm.ainvoke(
+    # Only "job" skips routing: the chat UI sends mode="normal" for every
+    # non-pro message, so "normal" still has to go through the classifier
+    if state.get("mode") == "job":
+        _route_stats["explicit"] += 1
+        log("ROUTE (explicit)", state["mode"])
+        return {"mode": "job"}
+
+    mode, confidence = classify_intent(user_input)
+    if confidence >= ROUTER_CONFIDENCE:
+        _route_stats["local"] += 1
+        log("ROUTE (local)", {"mode": mode, "confidence": confidence})
+        return {"mode": mode}
+
+    _route_stats["llm"] += 1
+    log("ROUTE (llm fallback)", {"local_guess": mode, "confidence": confidence})
+
+    async with rate_limited("gemini"):
+        decision: RouteDecision = await router_llm.ainvoke(
         f"""
 Classify the user message into ONE mode:
 - job: job/internship/hiring/openings/resume/job search intent
@@ -41,9 +133,80 @@ Return only the mode.
 User message:
 {user_input}
 """
-    )
+        )
+
+    return {"mode": decision.mode}
 
-    return {**state, "mode": decision.mode}
 
+# -----------------------
+# Fused Router + Query Node
+# -----------------------
+async def route_and_parse_node(state: AppState) -> AppState:
+    """
+    Optional replacement for route -> job_query.
+    Decides the mode and, for job queries, fills keywords/location/limit and
+    sets query_parsed so the graph can skip the job_query node.
+    At most ONE LLM call: local tiers first, then a single IntentQuery call.
+    """
+    user_input = state["user_input"]
+    # Only an explicit "job" skips routing (see route_node)
+    explicit = state.get("mode") == "job"
+
+    if explicit:
+        mode, confidence = "job", 1.0
+        _route_stats["explicit"] += 1
+    else:
+        mode, confidence = classify_intent(user_input)
+        if confidence >= ROUTER_CONFIDENCE and mode == "normal":
+            _route_stats["local"] += 1
+            log("ROUTE (local)", {"mode": mode, "confidence": confidence})
+            return {"mode": "normal"}
+
+    local = parse_job_query_local(user_input)
+    if confidence >= ROUTER_CONFIDENCE and local.confidence >= QUERY_PARSER_CONFIDENCE:
+        if not explicit:
+            _route_stats["local"] += 1
+        log("ROUTE + QUERY (local)", {"mode": mode, **local.__dict__})
+        return {
+            "mode": "job",
+            "keywords": local.keywords,
+            "location": local.location,
+            "limit": local.limit or state.get("limit") or 5,
+            "query_parsed": True,
+        }
+
+    if explicit:
+        # Mode is known, only the query is unclear: leave it to job_query
+        return {"mode": "job"}
+
+    _route_stats["fused_llm"] += 1
+    log("ROUTE + QUERY (fused llm)", {"local_guess": mode, "confidence": confidence})
+
+    async with rate_limited("gemini"):
+        decision: IntentQuery = await intent_query_llm.ainvoke(
+        f"""
+Classify the user message into ONE mode:
+- job: job/internship/hiring/openings/resume/job search intent
+- normal: everything else
+
+If the mode is job, also extract the job search query:
+- keywords as list
+- location as list
+- limit as integer (default to 5 if not specified)
+If the mode is normal, return empty lists.
+
+User message:
+{user_input}
+"""
+        )
 
+    if decision.mode != "job":
+        return {"mode": "normal"}
 
+    return {
+        "mode": "job",
+        "keywords": decision.keywords,
+        "location": decision.location,
+        "limit": decision.limit,
+        "query_parsed": True,
+    }
@@ -1,16 +1,21 @@
 import os
-from typing import List, Dict, Any, Optional
-import time
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Optional, AsyncIterator, Union
+from urllib.parse import urlparse
 
 from dotenv import load_dotenv
-from firecrawl import Firecrawl
-from tavily import TavilyClient
 
 from pydantic import BaseModel, Field
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import PromptTemplate
-from config import AppState, log
+from config import AppState, log, emit, STRUCTURE_CONCURRENCY, TAVILY_EXTRACT_BATCH
+from components.rate_limit import rate_limited
+from components.clients import tavily_extract, firecrawl_scrape
+from components.page_cache import page_cache, canonical_url
+from components.extraction_cache import extraction_cache, extraction_key
+from components.scrape_tiers import tier_stats, looks_complete
 
 
 # ============================
@@ -18,9 +23,6 @@ from config import AppState, log
 # ============================
 load_dotenv()
 
-firecrawl = Firecrawl("fc-66f8af9cd9b349848648d3abb89e8f57")
-tavily_client = TavilyClient("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")
-
 llm = ChatGoogleGenerativeAI(
     model="gemini-2.5-flash",
     google_api_key=os.getenv("GOOGLE_API_KEY_2"),
@@ -55,6 +57,45 @@ class JobList(BaseModel):
     jobs: List[Job] = Field(default_factory=list)
 
 
+# ============================
+# EXTRACTION CHAIN
+# ============================
+extraction_parser = PydanticOutputParser(pydantic_object=JobList)
+
+extraction_prompt = PromptTemplate(
+    template="""
+You are an information extraction system.
+
+Extract job information from the given scraped markdown.
+
+Rules:
+- Output MUST be valid JSON only
+- Output MUST match the schema exactly
+- If a value is missing: use null (or [] for lists)
+- work_mode must be one of: Remote, Hybrid, Onsite, Unknown
+- source_url must be the original url provided
+
+Schema:
+{format_instructions}
+
+SOURCE URL: {url}
+
+SCRAPED MARKDOWN:
+{markdown}
+""",
+    input_variables=["markdown", "url"],
+    partial_variables={"format_instructions": extraction_parser.get_format_instructions()},
+)
+
+extraction_chain = extraction_prompt | llm | extraction_parser
+
+# Changes whenever the prompt or the Job schema changes, so cached
+# extractions from an older prompt/schema are never served.
+EXTRACTION_VERSION = hashlib.sha256(
+    (extraction_prompt.template + extraction_parser.get_format_instructions()).encode("utf-8")
+).hexdigest()[:16]
+
+
 # ============================
 # INTERNAL HELPER
 # ============================
@@ -85,134 +126,350 @@ def _is_expired(markdown: str) -> bool:
     return False
 
 
-# ============================
-# LANGGRAPH NODE (MAIN)
-# ============================
-async def structured_data_node(state: AppState) -> AppState:
-    """
-    ✅ Reads:  state["job_urls"]
-    ✅ Writes: state["structured_data"]
-    ✅ Returns: updated AppState
-    """
+def _is_linkedin(url: str) -> bool:
+    return "linkedin.com" in url
 
-    urls = state.get('job_urls', [])
-    limit = state.get('limit', 5) # Default limit if not set
-    log("STRUCTURE NODE START", {"url_count": len(urls), "target_limit": limit})
 
-    if not urls:
-        return {**state, "structured_data": {"jobs": []}}
+def _url_key(url: str) -> str:
+    # Tavily may echo URLs back with a different trailing slash / case
+    return (url or "").strip().rstrip("/").lower()
 
-    parser = PydanticOutputParser(pydantic_object=JobList)
 
-    prompt = PromptTemplate(
-        template="""
-You are an information extraction system.
+async def _fetch_linkedin_batch(urls: List[str]) -> Dict[str, str]:
+    """
+    One Tavily extract call for several LinkedIn URLs.
+    Returns {original_url: markdown} for the pages that came back.
+    """
+    # extract returns: {'results': [{'url': '...', 'raw_content': '...', 'content': '...'}], 'failed_results': [...]}
+    response = await tavily_extract(urls, extract_depth="advanced")
 
-Extract job information from the given scraped markdown.
+    wanted = {_url_key(u): u for u in urls}
+    pages: Dict[str, str] = {}
+    for res in (response or {}).get("results", []):
+        returned_url = res.get("url", "")
+        url = wanted.get(_url_key(returned_url), returned_url)
+        # Prefer raw_content if available, else content
+        pages[url] = res.get("raw_content") or res.get("content", "")
 
-Rules:
-- Output MUST be valid JSON only
-- Output MUST match the schema exactly
-- If a value is missing: use null (or [] for lists)
-- work_mode must be one of: Remote, Hybrid, Onsite, Unknown
-- source_url must be the original url provided
-
-Schema:
-{format_instructions}
+    missing = [u for u in urls if u not in pages]
+    if missing:
+        log("TAVILY EXTRACT FAILED", missing)
+    return pages
 
-SOURCE URL: {url}
 
-SCRAPED MARKDOWN:
-{markdown}
-""",
-        input_variables=["markdown", "url"],
-        partial_variables={"format_instructions": parser.get_format_instructions()},
-    )
+async def _fetch_markdown(url: str) -> str:
+    """
+    Scrapes a single non-LinkedIn job page (Indeed, etc.) with Firecrawl.
+    LinkedIn pages always go through _fetch_linkedin_batch.
+    Returns "" when the page could not be fetched.
+    """
+    # Shortest wait first, longer waits only while the page does not look
+    # fully rendered
+    domain = urlparse(url).netloc
+    tiers = tier_stats.tiers
+    best = ""
+    for tier in range(tier_stats.start_tier(domain), len(tiers)):
+        try:
+            async with rate_limited(domain):
+                doc = await firecrawl_scrape(
+                    url,
+                    formats=["markdown"],
+                    **({"wait_for": tiers[tier]} if tiers[tier] else {}),
+                )
+            markdown = getattr(doc, "markdown", "") or ""
+        except Exception as fc_err:
+            # 429 / timeout / 5xx: a longer wait_for would not help, and the
+            # failure says nothing about how long this domain needs to render
+            log("FIRECRAWL EXTRACT FAILED", {"url": url, "wait_for": tiers[tier], "error": str(fc_err)})
+            break
 
-    chain = prompt | llm | parser
+        # An "expired" notice is a complete answer too: waiting won't help
+        complete = looks_complete(markdown) or bool(markdown and _is_expired(markdown))
+        tier_stats.record(domain, tier, complete)
+        if complete:
+            return markdown
+        if len(markdown) > len(best):
+            best = markdown
+        log("FIRECRAWL PAGE INCOMPLETE", {"url": url, "wait_for": tiers[tier], "chars": len(markdown)})
 
-    all_jobs: List[Job] = []
+    # Nothing looked complete: hand the fullest attempt to extraction anyway
+    # (it is not written to the page cache, see scrape() in _run_pipeline)
+    return best
 
-    for url in urls:
-        # Stop if we reached the limit
-        if len(all_jobs) >= limit:
-            log("LIMIT REACHED", len(all_jobs))
-            break
 
+async def _extract_jobs(chain, url: str, markdown: str) -> List[Job]:
+    """
+    Runs the LLM extraction chain on one page and returns validated jobs.
+    Byte-identical pages are served from the extraction cache.
+    """
+    markdown = _clean_markdown(markdown)
+    cache_key = extraction_key(markdown, EXTRACTION_VERSION, getattr(llm, "model", ""))
+
+    try:
+        cached = await extraction_cache.aget(cache_key)
+    except Exception as e:
+        log("EXTRACTION CACHE READ FAILED", str(e))
+        cached = None
+
+    if cached is not None:
+        log("EXTRACTION CACHE HIT", url)
+        jobs = [Job.model_validate(j) for j in cached["jobs"]]
+        # Same content seen under another URL: point it at this one
+        for job in jobs:
+            if job.source_url == cached["url"]:
+                job.source_url = url
+        return jobs
+
+    async with rate_limited("gemini"):
+        structured: JobList = await chain.ainvoke({"markdown": markdown, "url": url})
+
+    jobs: List[Job] = []
+    for job in structured.jobs:
+        try:
+            # Ensure we have a Job instance (parser may return Job objects or dicts)
+            if isinstance(job, Job):
+                validated_job = job
+            else:
+                validated_job = Job.model_validate(job)
+
+            # Ensure source_url is set to the original URL
+            if not validated_job.source_url:
+                validated_job.source_url = url
+
+            jobs.append(validated_job)
+        except Exception:
+            # Skip malformed extractions
+            continue
+
+    if not jobs:
+        # Usually a partial page: let the next scrape try again
+        return jobs
+
+    try:
+        await extraction_cache.aset(cache_key, {"url": url, "jobs": [j.model_dump() for j in jobs]})
+    except Exception as e:
+        log("EXTRACTION CACHE WRITE FAILED", str(e))
+    return jobs
+
+
+async def _run_pipeline(
+    urls: Union[List[str], AsyncIterator[List[str]]],
+    chain,
+    limit: int,
+    concurrency: int,
+) -> List[Job]:
+    """
+    Concurrent scrape -> extract pipeline.
+
+    `urls` is a list, or an async iterator of URL batches (e.g. one batch per
+    search source): each batch starts scraping as soon as it arrives, while
+    later batches are still being searched for.
+    Scrapers push (url, markdown) onto a queue, extraction workers consume it.
+    Pages found in the page cache skip the network entirely.
+    LinkedIn URLs are fetched in batched Tavily extract calls, every page of a
+    batch is queued for extraction as soon as the batch returns.
+    At most `concurrency` scrapes and `concurrency` LLM extractions are in flight,
+    and the queue holds at most `concurrency` pages: a scraper keeps its slot
+    until its page is queued, so scraping never runs ahead of extraction.
+    A page is only fetched while jobs found + pages in flight < `limit`; a
+    page that yields no job frees its place for the next URL.
+    As soon as `limit` jobs are collected, all outstanding work is cancelled.
+    """
+    concurrency = max(1, concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    scrape_slots = asyncio.Semaphore(concurrency)
+    limit_reached = asyncio.Event()
+    all_jobs: List[Job] = []
+    scrapers: List[asyncio.Task] = []
+    seen = set()
+    # Pages fetched / queued / extracting whose jobs are not counted yet
+    in_flight = 0
+    demand = asyncio.Condition()
+
+    async def claim(pages: int):
+        # Wait until more pages could still be needed to reach `limit`
+        nonlocal in_flight
+        async with demand:
+            await demand.wait_for(lambda: len(all_jobs) + in_flight < limit)
+            in_flight += pages
+
+    async def release(pages: int = 1):
+        nonlocal in_flight
+        async with demand:
+            in_flight -= pages
+            demand.notify_all()
+
+    async def enqueue(url: str, markdown: str):
+        # Check expiration
+        if _is_expired(markdown):
+            log("JOB EXPIRED - SKIPPING", url)
+            await release()
+            return
+        await queue.put((url, markdown))
+
+    async def enqueue_cached(url: str, markdown: str):
+        await claim(1)
+        await enqueue(url, markdown)
+
+    async def remember(url: str, markdown: str):
+        if not markdown:
+            return
         try:
-            markdown = ""
-            
-            if "linkedin.com" in url:
-                # Use Tavily for LinkedIn
-                # extract returns: {'results': [{'url': '...', 'raw_content': '...', 'content': '...'}], ...}
-                response = tavily_client.extract(urls=[url],extract_depth="advanced")
-                if response and "results" in response and len(response["results"]) > 0:
-                    # Prefer raw_content if available, else content
-                    res = response["results"][0]
-                    markdown = res.get("raw_content") or res.get("content", "")
-                else:
-                    log("TAVILY EXTRACT FAILED", url)
-                    continue
+            await page_cache.aset(canonical_url(url), markdown)
+        except Exception as e:
+            log("PAGE CACHE WRITE FAILED", str(e))
+
+    async def scrape(url: str):
+        await claim(1)
+        async with scrape_slots:
+            try:
+                markdown = await _fetch_markdown(url)
+            except Exception as e:
+                log("STRUCTURE ERROR", str(e))
+                await release()
+                return
+            # A loader / bot wall must not stand in for the posting for a day
+            if looks_complete(markdown) or (markdown and _is_expired(markdown)):
+                await remember(url, markdown)
             else:
-                # Use Firecrawl for others (Indeed, etc.)
-                try:
-                    doc = firecrawl.scrape(
-                        url,
-                        wait_for=10000,
-                        formats=["markdown"],
-                    )
-                    time.sleep(3)
-                    markdown = getattr(doc, "markdown", "") or ""
-                except Exception as fc_err:
-                     log("FIRECRAWL EXTRACT FAILED", str(fc_err))
-                     continue
-
-            # Check expiration
-            if _is_expired(markdown):
-                log("JOB EXPIRED - SKIPPING", url)
-                continue
-
-            markdown = _clean_markdown(markdown)
-
-            structured: JobList = chain.invoke({"markdown": markdown, "url": url})
-            
-            # Add valid jobs and ensure source_url present
-            if structured.jobs:
-                for job in structured.jobs:
+                log("PAGE NOT CACHED (incomplete)", url)
+            # Slot held until the page is queued (backpressure from extraction)
+            await enqueue(url, markdown)
+
+    async def scrape_batch(batch: List[str]):
+        await claim(len(batch))
+        async with scrape_slots:
+            try:
+                pages = await _fetch_linkedin_batch(batch)
+            except Exception as e:
+                log("STRUCTURE ERROR", str(e))
+                await release(len(batch))
+                return
+            missing = len([url for url in batch if url not in pages])
+            if missing:
+                await release(missing)
+            for url in batch:
+                if url in pages:
+                    await remember(url, pages[url])
+                    await enqueue(url, pages[url])
+
+    async def extract_worker():
+        while True:
+            url, markdown = await queue.get()
+            try:
+                for job in await _extract_jobs(chain, url, markdown):
                     # Stop adding if we already reached the limit
                     if len(all_jobs) >= limit:
                         break
-                        
-                    try:
-                        # Ensure we have a Job instance (parser may return Job objects or dicts)
-                        if isinstance(job, Job):
-                            validated_job = job
-                        else:
-                            validated_job = Job.model_validate(job)
-
-                        # Ensure source_url is set to the original URL
-                        if not validated_job.source_url:
-                            validated_job.source_url = url
-
-                        all_jobs.append(validated_job)
-                        log("JOB ADDED", f"{len(all_jobs)}/{limit}")
-                    except Exception:
-                        # Skip malformed extractions
-                        continue
+                    all_jobs.append(job)
+                    log("JOB ADDED", f"{len(all_jobs)}/{limit}")
+                    emit({"type": "job", "job": job.model_dump(), "count": len(all_jobs), "limit": limit})
+                if len(all_jobs) >= limit:
+                    limit_reached.set()
+            except Exception as e:
+                # User wants valid jobs, so skip failed/malformed extractions.
+                log("STRUCTURE ERROR", str(e))
+            finally:
+                queue.task_done()
+                await release()
+
+    async def add_urls(batch: List[str]):
+        # Same posting from two sources / two spellings: scrape it once
+        new_urls = []
+        for url in batch:
+            key = canonical_url(url)
+            if key not in seen:
+                seen.add(key)
+                new_urls.append(url)
+        if not new_urls:
+            return
 
+        try:
+            cached = await page_cache.aget_many(canonical_url(u) for u in new_urls)
         except Exception as e:
-            log("STRUCTURE ERROR", str(e))
-            # Don't add failed extractions or maybe add with error note?
-            # User wants valid jobs, so better to skip failed/malformed ones.
-            pass
+            log("PAGE CACHE READ FAILED", str(e))
+            cached = {}
+        hits = [u for u in new_urls if canonical_url(u) in cached]
+        to_scrape = [u for u in new_urls if canonical_url(u) not in cached]
+        log("PAGE CACHE", {"hits": len(hits), "misses": len(to_scrape)})
+
+        linkedin_urls = [u for u in to_scrape if _is_linkedin(u)]
+        batch_size = max(1, TAVILY_EXTRACT_BATCH)
+        batches = [linkedin_urls[i : i + batch_size] for i in range(0, len(linkedin_urls), batch_size)]
+
+        scrapers.extend(asyncio.create_task(enqueue_cached(url, cached[canonical_url(url)])) for url in hits)
+        scrapers.extend(asyncio.create_task(scrape_batch(b)) for b in batches)
+        scrapers.extend(asyncio.create_task(scrape(url)) for url in to_scrape if not _is_linkedin(url))
+
+    async def feed():
+        if isinstance(urls, list):
+            await add_urls(urls)
+            return
+        try:
+            async for batch in urls:
+                await add_urls(batch)
+        finally:
+            # Stops the producer (e.g. a search still running) when we stop early
+            await urls.aclose()
+
+    async def drain():
+        await feed()
+        await asyncio.gather(*scrapers)
+        await queue.join()
+
+    workers = [asyncio.create_task(extract_worker()) for _ in range(concurrency)]
+    drained = asyncio.create_task(drain())
+    stopped = asyncio.create_task(limit_reached.wait())
+
+    try:
+        await asyncio.wait({drained, stopped}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if limit_reached.is_set():
+            log("LIMIT REACHED", len(all_jobs))
+        # drained first: it owns feed(), which must stop adding scrapers
+        drained.cancel()
+        await asyncio.gather(drained, return_exceptions=True)
+        pending = scrapers + workers + [stopped]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return all_jobs[:limit]
+
+
+async def structure_urls(urls: Union[List[str], AsyncIterator[List[str]]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Scrapes + extracts `urls` (up to `limit` jobs) and returns plain job dicts.
+    Shared by the graph nodes and the paginated crawl sessions.
+    """
+    all_jobs = await _run_pipeline(urls, extraction_chain, limit, STRUCTURE_CONCURRENCY)
 
     # Final info log
-    log("SCRAPING COMPLETE", f"Got {len(all_jobs)} valid jobs out of {limit} requested from {len(urls)} URLs")
+    log("SCRAPING COMPLETE", f"Got {len(all_jobs)} valid jobs out of {limit} requested")
 
     # Convert all Job objects to plain dicts for storage
-    structured_data_dict = JobList(jobs=[j.model_dump() for j in all_jobs]).model_dump()
+    return JobList(jobs=[j.model_dump() for j in all_jobs]).model_dump()["jobs"]
+
+
+# ============================
+# LANGGRAPH NODE (MAIN)
+# ============================
+async def structured_data_node(state: AppState) -> AppState:
+    """
+    ✅ Reads:  state["job_urls"]
+    ✅ Writes: state["structured_data"]
+    ✅ Returns: only the keys it changed
+    """
+
+    urls = state.get('job_urls', [])
+    limit = state.get('limit', 5) # Default limit if not set
+    log("STRUCTURE NODE START", {"url_count": len(urls), "target_limit": limit, "concurrency": STRUCTURE_CONCURRENCY})
+
+    if not urls:
+        return {"structured_data": {"jobs": []}}
+
+    jobs = await structure_urls(urls, limit)
 
     return {
-        **state,
-        "structured_data": structured_data_dict
+        "structured_data": {"jobs": jobs}
     }
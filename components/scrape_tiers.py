@@ -0,0 +1,93 @@
+"""
+Adaptive Firecrawl wait tiers.
+
+A page is scraped with the shortest wait_for first (FIRECRAWL_WAIT_TIERS,
+e.g. 0 / 3000 / 10000 ms) and retried with the next tier only when the
+markdown does not look like a complete posting. Per domain and tier we keep
+a decaying success rate, and later scrapes of that domain start at the
+lowest tier that usually works:
+  - a tier with too few recent samples is tried (so every tier gets explored)
+  - a tier whose success rate is below FIRECRAWL_TIER_SUCCESS is skipped
+Samples decay on every record for the domain, so a skipped tier is retried
+once its old failures have faded.
+"""
+import re
+from typing import Dict, List
+
+from config import FIRECRAWL_WAIT_TIERS, FIRECRAWL_TIER_SUCCESS, FIRECRAWL_TIER_MIN_SAMPLES
+
+DECAY = 0.98
+MIN_DESCRIPTION_CHARS = 500
+
+_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_HEADING_RE = re.compile(r"^\s*#{1,3}\s+\S", re.MULTILINE)
+_PLACEHOLDERS = (
+    "loading...",
+    "please wait",
+    "enable javascript",
+    "javascript is disabled",
+    "just a moment",
+    "checking your browser",
+    "verify you are human",
+    "access denied",
+    "captcha",
+)
+
+
+def looks_complete(markdown: str) -> bool:
+    """
+    Heuristic "the posting has rendered" check: a title heading, enough
+    description text once links are stripped, and no loader / bot-wall text.
+    """
+    if not markdown:
+        return False
+    text = _LINK_RE.sub(r"\1", markdown)
+    lowered = text.lower()
+    if any(p in lowered for p in _PLACEHOLDERS) and len(text.strip()) < 4 * MIN_DESCRIPTION_CHARS:
+        return False
+    return bool(_HEADING_RE.search(text)) and len(text.strip()) >= MIN_DESCRIPTION_CHARS
+
+
+class TierStats:
+    def __init__(self, tiers: List[int]):
+        self.tiers = tiers
+        # domain -> per tier [weighted attempts, weighted successes]
+        self._domains: Dict[str, List[List[float]]] = {}
+
+    def _counts(self, domain: str) -> List[List[float]]:
+        return self._domains.setdefault(domain, [[0.0, 0.0] for _ in self.tiers])
+
+    def start_tier(self, domain: str) -> int:
+        for tier, (attempts, successes) in enumerate(self._counts(domain)):
+            if attempts < FIRECRAWL_TIER_MIN_SAMPLES:
+                return tier
+            if successes / attempts >= FIRECRAWL_TIER_SUCCESS:
+                return tier
+        return len(self.tiers) - 1
+
+    def record(self, domain: str, tier: int, success: bool):
+        counts = self._counts(domain)
+        for c in counts:
+            c[0] *= DECAY
+            c[1] *= DECAY
+        counts[tier][0] += 1
+        counts[tier][1] += 1 if success else 0
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        return {
+            domain: {
+                "start_tier_ms": self.tiers[self.start_tier(domain)],
+                "tiers": [
+                    {
+                        "wait_ms": wait,
+                        "samples": round(attempts, 2),
+                        "success_rate": round(successes / attempts, 3) if attempts else None,
+                    }
+                    for wait, (attempts, successes) in zip(self.tiers, counts)
+                ],
+            }
+            for domain, counts in self._domains.items()
+        }
+
+
+tier_stats = TierStats(FIRECRAWL_WAIT_TIERS)
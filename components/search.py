@@ -0,0 +1,113 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+from config import AppState, log, emit, STRUCTURE_CONCURRENCY
+from components.indeed import indeed_urls_node
+from components.linkedin import mcp_agent_node
+from components.scrap_structure import structure_urls
+
+
+def _source_urls(source: str, result) -> List[str]:
+    """
+    URLs from one source's node result (or the exception it raised);
+    reports the outcome to stream consumers.
+    """
+    urls: List[str] = []
+    if isinstance(result, dict):
+        urls = result.get("job_urls", [])
+    else:
+        log(f"{source.upper()} SEARCH FAILED", str(result))
+    emit({"type": "urls", "source": source, "count": len(urls), "ok": isinstance(result, dict)})
+    return urls
+
+
+# =======================
+# PARALLEL SEARCH NODE
+# =======================
+async def parallel_search_node(state: AppState) -> AppState:
+    """
+    Executes LinkedIn (MCP) and Indeed (Tavily) searches in parallel.
+    Merges found job URLs.
+    """
+    log("PARALLEL SEARCH NODE START")
+
+    # Run both tasks concurrently
+    # Note: Both nodes take state and return {"job_urls": ...}
+    # We pass the same initial state to both.
+    results = await asyncio.gather(
+        mcp_agent_node(state),
+        indeed_urls_node(state),
+        return_exceptions=True
+    )
+
+    linkedin_res, indeed_res = results
+
+    # Process LinkedIn Results
+    l_urls = _source_urls("linkedin", linkedin_res)
+
+    # Process Indeed Results
+    i_urls = _source_urls("indeed", indeed_res)
+
+    # Interleave URLs: [L1, I1, L2, I2, ...]
+    final_urls = []
+    max_len = max(len(l_urls), len(i_urls))
+
+    for k in range(max_len):
+        if k < len(l_urls):
+            final_urls.append(l_urls[k])
+        if k < len(i_urls):
+            final_urls.append(i_urls[k])
+
+    # Dedup preserving order
+    unique_urls = list(dict.fromkeys(final_urls))
+    log("MERGED JOB URLS (Interleaved)", unique_urls)
+
+    return {"job_urls": unique_urls}
+
+
+# =======================
+# PIPELINED SEARCH + STRUCTURE NODE
+# =======================
+async def search_sources(state: AppState, found: Optional[List[str]] = None) -> AsyncIterator[List[str]]:
+    """
+    Yields each source's URLs as soon as that source answers (fastest first).
+    Every yielded URL is also appended to `found`. Closing the generator
+    early cancels the searches still running.
+    """
+    tasks = {
+        asyncio.create_task(mcp_agent_node(state)): "linkedin",
+        asyncio.create_task(indeed_urls_node(state)): "indeed",
+    }
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.exception() or task.result()
+                urls = _source_urls(tasks[task], result)
+                log("SOURCE URLS READY", {"source": tasks[task], "count": len(urls)})
+                if found is not None:
+                    found.extend(urls)
+                if urls:
+                    yield urls
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def search_structure_node(state: AppState) -> AppState:
+    """
+    Pipelined parallel_search -> structure: URLs from whichever source
+    answers first are scraped and extracted while the other source is still
+    searching. Stops both stages once `limit` jobs are extracted.
+    """
+    limit = state.get("limit", 5)
+    log("SEARCH + STRUCTURE NODE START", {"target_limit": limit, "concurrency": STRUCTURE_CONCURRENCY})
+
+    found: List[str] = []
+    jobs = await structure_urls(search_sources(state, found), limit)
+
+    return {
+        "job_urls": list(dict.fromkeys(found)),
+        "structured_data": {"jobs": jobs},
+    }
@@ -0,0 +1,183 @@
+"""
+Small on-disk key/value cache on top of SQLite.
+
+- values are JSON encoded and zlib compressed
+- entries expire after `ttl_seconds`
+- the table is kept under `max_bytes` (compressed) and `max_entries` by
+  evicting the least recently used entries
+- hit / miss / eviction counters for monitoring
+
+The file can be shared by several processes (WAL mode), which makes this
+the shared backend for multi-worker deployments.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from components.cache_backend import CacheBackend
+
+
+class SqliteCache(CacheBackend):
+    def __init__(self, path: str, table: str, ttl_seconds: float, max_bytes: int, max_entries: int = 0):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ----------------------------
+    # connection
+    # ----------------------------
+    def _db(self) -> sqlite3.Connection:
+        # Opened lazily so importing a module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # ----------------------------
+    # sync API
+    # ----------------------------
+    def get(self, key: str) -> Any:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        found: Dict[str, Any] = {}
+        with self._lock:
+            db = self._db()
+            marks = ",".join("?" * len(keys))
+            rows = db.execute(
+                f"SELECT key, value, created FROM {self.table} WHERE key IN ({marks})", keys
+            ).fetchall()
+
+            expired = []
+            for key, blob, created in rows:
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    expired.append(key)
+                    continue
+                found[key] = json.loads(zlib.decompress(blob))
+
+            if expired:
+                db.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in expired])
+            if found:
+                db.executemany(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", [(now, k) for k in found])
+            db.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: Any):
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._evict(db)
+            db.commit()
+
+    def add(self, key: str, value: Any) -> bool:
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            # One write transaction: other processes cannot add in between
+            if self.ttl_seconds:
+                db.execute(
+                    f"DELETE FROM {self.table} WHERE key = ? AND created < ?", (key, now - self.ttl_seconds)
+                )
+            cursor = db.execute(
+                f"INSERT OR IGNORE INTO {self.table} (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._evict(db)
+            db.commit()
+        return added
+
+    def delete(self, key: str):
+        with self._lock:
+            db = self._db()
+            db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute(f"DELETE FROM {self.table}")
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        if not self.max_bytes and not self.max_entries:
+            return
+        count, total = db.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+
+        def over_budget() -> bool:
+            return bool(
+                (self.max_bytes and total > self.max_bytes)
+                or (self.max_entries and count > self.max_entries)
+            )
+
+        if not over_budget():
+            return
+        # Oldest accessed first until we are back under budget
+        for key, size in db.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed ASC").fetchall():
+            if not over_budget():
+                break
+            db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            count -= 1
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db().execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
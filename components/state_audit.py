@@ -0,0 +1,67 @@
+"""
+State-size audit for graph runs.
+
+Measures the JSON size of AppState after every graph step, so a node that
+starts echoing lists back into an operator.add reducer (state doubling each
+step) shows up as a number instead of as slow, memory hungry runs.
+
+    result, audit = await audit_graph(app, state, strict=True)  # raises if too big
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import log, STATE_AUDIT_MAX_BYTES
+
+
+class StateSizeError(RuntimeError):
+    pass
+
+
+def state_size(state: Dict[str, Any]) -> int:
+    return len(json.dumps(state, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class StateAudit:
+    def __init__(self, max_bytes: int = STATE_AUDIT_MAX_BYTES, strict: bool = False):
+        self.max_bytes = max_bytes
+        self.strict = strict
+        self.steps: List[Tuple[str, int]] = []
+
+    def record(self, node: str, state: Dict[str, Any]) -> int:
+        size = state_size(state)
+        self.steps.append((node, size))
+        log("STATE SIZE", {"node": node, "bytes": size})
+
+        if self.max_bytes and size > self.max_bytes:
+            message = f"state is {size} bytes after '{node}' (max {self.max_bytes})"
+            if self.strict:
+                raise StateSizeError(message)
+            log("STATE SIZE OVER LIMIT", message)
+        return size
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "steps": [{"node": node, "bytes": size} for node, size in self.steps],
+            "max_bytes": max((size for _, size in self.steps), default=0),
+        }
+
+
+async def audit_graph(app, state: Dict[str, Any], max_bytes: Optional[int] = None, strict: bool = False):
+    """
+    Runs a compiled graph and records the state size after each step.
+    Returns (final state, StateAudit).
+    """
+    audit = StateAudit(STATE_AUDIT_MAX_BYTES if max_bytes is None else max_bytes, strict=strict)
+    audit.record("input", state)
+
+    result: Dict[str, Any] = state
+    nodes: List[str] = []
+    async for mode, chunk in app.astream(state, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            nodes.extend(chunk)
+        elif mode == "values":
+            result = chunk
+            if nodes:
+                audit.record("+".join(nodes), chunk)
+                nodes = []
+    return result, audit
@@ -1,7 +1,9 @@
 """
 Shared configuration, types, and utilities
 """
+import os
 import json
+import hashlib
 from typing import TypedDict, List, Dict, Any, Literal, Optional, Annotated
 import operator
 
@@ -21,11 +23,13 @@ import operator
 class AppState(TypedDict, total=False):
     # --- core ---
     user_input: str
-    mode: Literal["normal", "job"]
+    mode: Optional[Literal["normal", "job"]]  # preset = explicit, None = let the router decide
 
     keywords: Annotated[List[str], operator.add] # ✅ multiple keywords
     location: Annotated[List[str], operator.add]
     limit: Optional[int]
+    query_parsed: bool  # keywords/location/limit already filled (fused router)
+    search_done: bool   # job_urls already collected (speculative router)
 
     # --- collected URLs from sources ---
     job_urls: Annotated[List[str], operator.add]   # LinkedIn + Indeed URLs
@@ -35,6 +39,125 @@ class AppState(TypedDict, total=False):
     structured_data: Optional[Dict[str, Any]]
     # --- final formatted response ---
     final_answer: Optional[str]
+# =======================
+# TUNABLES
+# =======================
+# Max URLs scraped / extracted at the same time by the structure node.
+STRUCTURE_CONCURRENCY = int(os.getenv("STRUCTURE_CONCURRENCY", "4"))
+
+# LinkedIn URLs per Tavily extract call (the API accepts up to 20).
+TAVILY_EXTRACT_BATCH = int(os.getenv("TAVILY_EXTRACT_BATCH", "10"))
+
+# On-disk cache of scraped page markdown (SQLite, zlib compressed bodies).
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# Cache backend for every cache ("memory" or "sqlite"); unset = each cache's
+# default. Per cache: <NAME>_CACHE_BACKEND, e.g. SEARCH_CACHE_BACKEND=sqlite.
+# "sqlite" caches without their own file live in SHARED_CACHE_PATH, which
+# all uvicorn workers on the host share.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND") or None
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(CACHE_DIR, "shared.sqlite3"))
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(CACHE_DIR, "pages.sqlite3"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", str(24 * 3600)))  # seconds
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# On-disk cache of LLM extraction results (validated Job dicts).
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", os.path.join(CACHE_DIR, "extractions.sqlite3"))
+EXTRACTION_CACHE_TTL = float(os.getenv("EXTRACTION_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# In-memory API caches (server.py): TTL seconds, max entries, max bytes.
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "500"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Stale-while-revalidate for search_cache: entries older than the soft TTL
+# are still served but refreshed in the background; SEARCH_CACHE_TTL above
+# is the hard TTL after which a request has to wait for a fresh crawl.
+SEARCH_CACHE_SOFT_TTL = float(os.getenv("SEARCH_CACHE_SOFT_TTL", "600"))
+
+# Proactive refresh of hot queries: every HOT_REFRESH_INTERVAL seconds the
+# HOT_QUERY_COUNT most requested queries (score half-life POPULARITY_HALF_LIFE)
+# are re-crawled once they pass the soft TTL. 0 disables the loop.
+HOT_REFRESH_INTERVAL = float(os.getenv("HOT_REFRESH_INTERVAL", "300"))
+HOT_QUERY_COUNT = int(os.getenv("HOT_QUERY_COUNT", "5"))
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE", str(6 * 3600)))
+# A refresh first takes a lease on its query key in a cache next to
+# search_cache, so with a shared backend only one worker re-crawls a key.
+# The lease expires after REFRESH_LEASE_TTL seconds (a failed refresh keeps
+# it until then, which doubles as retry backoff).
+REFRESH_LEASE_TTL = float(os.getenv("REFRESH_LEASE_TTL", "300"))
+
+RESUME_CACHE_TTL = float(os.getenv("RESUME_CACHE_TTL", "1800"))
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "1000"))
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# score_cache: (profile fingerprint, job id) -> match score + reason, shared
+# by every search the same candidate runs.
+SCORE_CACHE_TTL = float(os.getenv("SCORE_CACHE_TTL", str(24 * 3600)))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "50000"))
+SCORE_CACHE_MAX_BYTES = int(os.getenv("SCORE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Resumable /jobs/search crawls (server.py): idle seconds before a session is
+# dropped, max live sessions, and max URLs a session pulls from the sources.
+CRAWL_SESSION_TTL = float(os.getenv("CRAWL_SESSION_TTL", "900"))
+CRAWL_SESSION_MAX = int(os.getenv("CRAWL_SESSION_MAX", "200"))
+CRAWL_MAX_URLS = int(os.getenv("CRAWL_MAX_URLS", "40"))
+
+# Resume ranking: jobs are ordered locally (components/ranker.py); the LLM
+# only rewrites match reasons for the visible page, within this many seconds.
+RANK_LLM_REASONS = os.getenv("RANK_LLM_REASONS", "1") == "1"
+RANK_LLM_TIMEOUT = float(os.getenv("RANK_LLM_TIMEOUT", "10"))
+
+# Local router classifier: minimum confidence to skip the routing LLM call.
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.6"))
+
+# Local job-query parser: minimum confidence to skip the LLM parse.
+QUERY_PARSER_CONFIDENCE = float(os.getenv("QUERY_PARSER_CONFIDENCE", "0.75"))
+
+# Use the fused route + job_query node (one LLM call instead of two).
+FUSED_ROUTING = os.getenv("FUSED_ROUTING", "1") == "1"
+
+# Start query parsing + URL search while the router is still deciding.
+# Off by default; flip it to compare latency against the serial flow.
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "0") == "1"
+
+# Pipelined search: scrape/extract each source's URLs as soon as that source
+# answers (search_structure node) instead of waiting for both searches.
+PIPELINED_SEARCH = os.getenv("PIPELINED_SEARCH", "1") == "1"
+
+# Ask Tavily for each Indeed result's page content along with the search and
+# use it instead of a Firecrawl scrape. Content shorter than
+# INDEED_MIN_CONTENT_CHARS counts as thin and the URL is scraped as before.
+INDEED_RAW_CONTENT = os.getenv("INDEED_RAW_CONTENT", "1") == "1"
+INDEED_MIN_CONTENT_CHARS = int(os.getenv("INDEED_MIN_CONTENT_CHARS", "800"))
+
+# Firecrawl wait_for tiers in ms (components/scrape_tiers.py): a page is
+# retried with the next tier only when it does not look complete. Per domain,
+# scraping starts at the lowest tier with a success rate of at least
+# FIRECRAWL_TIER_SUCCESS over FIRECRAWL_TIER_MIN_SAMPLES recent attempts.
+FIRECRAWL_WAIT_TIERS = [int(ms) for ms in os.getenv("FIRECRAWL_WAIT_TIERS", "0,3000,10000").split(",")]
+FIRECRAWL_TIER_SUCCESS = float(os.getenv("FIRECRAWL_TIER_SUCCESS", "0.7"))
+FIRECRAWL_TIER_MIN_SAMPLES = float(os.getenv("FIRECRAWL_TIER_MIN_SAMPLES", "3"))
+
+# Log the JSON size of AppState after every graph step (components/state_audit.py)
+# and warn past STATE_AUDIT_MAX_BYTES (0 = no limit).
+STATE_AUDIT = os.getenv("STATE_AUDIT", "0") == "1"
+STATE_AUDIT_MAX_BYTES = int(os.getenv("STATE_AUDIT_MAX_BYTES", str(512 * 1024)))
+
+# Token for the /admin/* endpoints (sent as the X-Admin-Token header).
+# Unset = admin endpoints are disabled.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+# Default token buckets: name -> (calls per second, burst).
+# Override any of them (or add a domain) with RATE_LIMIT_<NAME>="rate,burst",
+# e.g. RATE_LIMIT_FIRECRAWL="0.5,2" or RATE_LIMIT_IN_INDEED_COM="1,1".
+RATE_LIMITS = {
+    "firecrawl": (1 / 3, 1),
+    "tavily": (5, 5),
+    "linkedin_mcp": (2, 2),
+    "gemini": (4, 8),
+}
+
 # =======================
 # LOGGING
 # =======================
@@ -52,3 +175,29 @@ def log(title: str, data: Any = None):
         except Exception:
             print(data)
     print("=" * 90)
+
+
+# =======================
+# JOB IDS
+# =======================
+def generate_job_id(source_url: Optional[str]) -> str:
+    if not source_url:
+        return hashlib.md5(b"unknown").hexdigest()
+    return hashlib.md5(source_url.encode("utf-8")).hexdigest()
+
+
+# =======================
+# PROGRESS EVENTS
+# =======================
+def emit(event: Dict[str, Any]):
+    """
+    Sends a custom progress event to graph stream consumers
+    (stream_mode="custom"). No-op when not running inside a graph.
+    """
+    from langgraph.config import get_stream_writer
+
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer(event)
@@ -131,6 +131,7 @@ export default function ChatPage() {
     assistantMessageId: string
     onStatus?: (s: string) => void
     onDelta?: (d: string) => void
+    onJob?: (job: any) => void
   }): Promise<{ assistantText: string; jobs: any[] }> {
     setSending(true)
 
@@ -201,6 +202,7 @@ export default function ChatPage() {
         mode,
         onStatus: args.onStatus,
         onDelta: args.onDelta,
+        onJob: args.onJob,
       })
 
       const assistantText =
@@ -40,6 +40,7 @@ interface ChatInterfaceProps {
     assistantMessageId: string;
     onStatus?: (s: string) => void;
     onDelta?: (d: string) => void;
+    onJob?: (job: Job) => void;
   }) => Promise<{
     assistantText: string;
     jobs: Job[];
@@ -165,6 +166,21 @@ export default function ChatInterface({
               return next;
             });
           },
+          onJob: (job) => {
+            // Render job cards as soon as the backend validates them
+            setMessages((prev) => {
+              const idx = prev.findIndex((m) => m.id === assistantMessageId);
+              if (idx === -1) return prev;
+              const next = [...prev];
+              const current = next[idx];
+              const jobs = [...(current.metadata?.jobs || []), job];
+              next[idx] = {
+                ...current,
+                metadata: { ...(current.metadata || {}), type: "job_results", jobs },
+              };
+              return next;
+            });
+          },
         });
 
         setMessages((prev) => {
@@ -53,9 +53,19 @@ export async function sendQuery(
   return res.json();
 }
 
+export type NodeProgress = {
+  node: string;
+  status: "started" | "finished";
+  ms?: number | null;
+  error?: string | null;
+};
+
 type StreamHandlers = {
   onStatus?: (status: string) => void;
   onDelta?: (delta: string) => void;
+  onNode?: (progress: NodeProgress) => void;
+  onUrls?: (found: { source: string; count: number; ok: boolean }) => void;
+  onJob?: (job: Job & { id?: string }) => void;
   signal?: AbortSignal;
 };
 
@@ -131,6 +141,16 @@ export async function sendQueryStream(
 
       if (evt.event === "status") opts.onStatus?.(evt.data.trim());
       if (evt.event === "token") opts.onDelta?.(evt.data);
+      if (evt.event === "node" || evt.event === "urls" || evt.event === "job") {
+        try {
+          const payload = JSON.parse(evt.data);
+          if (evt.event === "node") opts.onNode?.(payload);
+          if (evt.event === "urls") opts.onUrls?.(payload);
+          if (evt.event === "job") opts.onJob?.(payload.job);
+        } catch {
+          // ignore malformed progress events
+        }
+      }
       if (evt.event === "final") {
         try {
           finalPayload = JSON.parse(evt.data);
@@ -1,10 +1,11 @@
 import os
 import json
+import time
 import asyncio
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from typing import TypedDict, List, Literal, Any, Dict
-from config import AppState, log
+from config import AppState, log, FUSED_ROUTING, SPECULATIVE_SEARCH, PIPELINED_SEARCH, STATE_AUDIT
 from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -13,12 +14,13 @@ from langchain_core.messages import HumanMessage
 import components.mcp_compat
 
 # Import Components
-from components.router import route_node
+from components.router import route_node, route_and_parse_node
 from components.job_query import parse_job_query_node
-from components.indeed import indeed_urls_node
-from components.linkedin import mcp_agent_node
+from components.search import parallel_search_node, search_structure_node
 from components.scrap_structure import structured_data_node
 from components.final_answer import final_answer_node
+from components.rate_limit import rate_limited
+from components.state_audit import audit_graph
 
 # =======================
 # ENV
@@ -34,82 +36,98 @@ llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.3, google_a
 
 async def normal_chat_node(state: AppState) -> AppState:
     log("NORMAL CHAT NODE", state["user_input"])
-    resp = await llm.ainvoke([HumanMessage(content=state["user_input"])])
-    return {**state, "final_answer": resp.content}
+    # Streamed so /chat/stream can forward tokens as they arrive
+    answer = ""
+    async with rate_limited("gemini"):
+        async for chunk in llm.astream([HumanMessage(content=state["user_input"])]):
+            answer += chunk.text
+    return {"final_answer": answer}
 
 # =======================
-# PARALLEL SEARCH NODE
+# SPECULATIVE ROUTE NODE
 # =======================
-async def parallel_search_node(state: AppState) -> AppState:
+async def speculative_route_node(state: AppState) -> AppState:
     """
-    Executes LinkedIn (MCP) and Indeed (Tavily) searches in parallel.
-    Merges found job URLs.
+    Runs route_node and, in parallel, job_query + parallel_search.
+    - router says "normal" -> speculative work is cancelled
+    - router says "job"    -> the already running search is awaited and its
+                              results are returned with search_done=True,
+                              so the graph jumps straight to structure.
     """
-    log("PARALLEL SEARCH NODE START")
-    
-    # Run both tasks concurrently
-    # Note: Both nodes take state and return {**state, "job_urls": ...}
-    # We pass the same initial state to both.
-    results = await asyncio.gather(
-        mcp_agent_node(state),
-        indeed_urls_node(state),
-        return_exceptions=True
-    )
-    
-    linkedin_res, indeed_res = results
-    
-    l_urls = []
-    i_urls = []
-    
-    # Process LinkedIn Results
-    if isinstance(linkedin_res, dict):
-        l_urls = linkedin_res.get("job_urls", [])
-    else:
-        log("LINKEDIN SEARCH FAILED", str(linkedin_res))
-        
-    # Process Indeed Results
-    if isinstance(indeed_res, dict):
-        i_urls = indeed_res.get("job_urls", [])
-    else:
-        log("INDEED SEARCH FAILED", str(indeed_res))
-        
-    # Interleave URLs: [L1, I1, L2, I2, ...]
-    final_urls = []
-    max_len = max(len(l_urls), len(i_urls))
-    
-    for k in range(max_len):
-        if k < len(l_urls):
-            final_urls.append(l_urls[k])
-        if k < len(i_urls):
-            final_urls.append(i_urls[k])
-
-    # Dedup preserving order
-    unique_urls = list(dict.fromkeys(final_urls))
-    log("MERGED JOB URLS (Interleaved)", unique_urls)
-    
-    return {**state, "job_urls": unique_urls}
+    started = time.perf_counter()
+
+    async def speculate() -> AppState:
+        spec = {**state, **(await parse_job_query_node(state))}
+        return {**spec, **(await parallel_search_node(spec))}
+
+    spec_task = asyncio.create_task(speculate())
+    try:
+        routed = await route_node(state)
+    except BaseException:
+        spec_task.cancel()
+        raise
+    route_ms = round((time.perf_counter() - started) * 1000)
+
+    if routed.get("mode") != "job":
+        spec_task.cancel()
+        await asyncio.gather(spec_task, return_exceptions=True)
+        log("SPECULATIVE SEARCH CANCELLED", {"route_ms": route_ms})
+        return {"mode": routed.get("mode", "normal")}
+
+    spec = await spec_task
+    log("SPECULATIVE SEARCH USED", {
+        "route_ms": route_ms,
+        "total_ms": round((time.perf_counter() - started) * 1000),
+    })
+    return {
+        "mode": "job",
+        "keywords": spec.get("keywords", []),
+        "location": spec.get("location", []),
+        "limit": spec.get("limit"),
+        "job_urls": spec.get("job_urls", []),
+        "query_parsed": True,
+        "search_done": True,
+    }
 
 # =======================
 # GRAPH
 # =======================
-def route_condition(state: AppState) -> Literal["normal_chat", "job_flow"]:
+def route_condition(state: AppState) -> Literal["normal_chat", "job_flow", "search", "structure"]:
     # Route based on the mode determined by the router node
     mode = state.get("mode", "normal")
     log("ROUTE CONDITION", mode)
-    return "job_flow" if mode == "job" else "normal_chat"
-
-
-def build_graph():
+    if mode != "job":
+        return "normal_chat"
+    # Speculative router already collected URLs -> skip job_query + search
+    if state.get("search_done"):
+        return "structure"
+    # Fused router already parsed the query -> skip job_query
+    return "search" if state.get("query_parsed") else "job_flow"
+
+
+def build_graph(
+    fused_routing: bool = FUSED_ROUTING,
+    speculative: bool = SPECULATIVE_SEARCH,
+    pipelined: bool = PIPELINED_SEARCH,
+):
     g = StateGraph(AppState)
 
     # Nodes
-    g.add_node("route", route_node)
+    if speculative:
+        g.add_node("route", speculative_route_node)
+    else:
+        g.add_node("route", route_and_parse_node if fused_routing else route_node)
     g.add_node("normal_chat", normal_chat_node)
     
     g.add_node("job_query", parse_job_query_node)
-    g.add_node("parallel_search", parallel_search_node)
     g.add_node("structure", structured_data_node)
     g.add_node("recommendation", final_answer_node)
+    # Pipelined: one node that searches and structures concurrently
+    search = "search_structure" if pipelined else "parallel_search"
+    if pipelined:
+        g.add_node("search_structure", search_structure_node)
+    else:
+        g.add_node("parallel_search", parallel_search_node)
 
     # Entry
     g.set_entry_point("route")
@@ -120,13 +138,18 @@ def build_graph():
         route_condition,
         {
             "normal_chat": "normal_chat",
-            "job_flow": "job_query"
+            "job_flow": "job_query",
+            "search": search,
+            "structure": "structure",
         },
     )
 
     # Job Flow Edges
-    g.add_edge("job_query", "parallel_search")
-    g.add_edge("parallel_search", "structure")
+    g.add_edge("job_query", search)
+    if pipelined:
+        g.add_edge("search_structure", "recommendation")
+    else:
+        g.add_edge("parallel_search", "structure")
     g.add_edge("structure", "recommendation")
     g.add_edge("recommendation", END)
 
@@ -136,6 +159,38 @@ def build_graph():
     return g.compile()
 
 
+async def retrieval_query_node(state: AppState) -> AppState:
+    parsed = await parse_job_query_node(state)
+    # The caller decides how many jobs it needs; a number in the text does not
+    return {**parsed, "limit": state.get("limit") or parsed.get("limit")}
+
+
+def build_retrieval_graph(pipelined: bool = PIPELINED_SEARCH):
+    """
+    Job retrieval only: job_query -> parallel_search -> structure
+    (job_query -> search_structure when pipelined).
+    No routing and no recommendation text, for callers (the /jobs endpoints)
+    that only need structured_data.
+    """
+    g = StateGraph(AppState)
+
+    g.add_node("job_query", retrieval_query_node)
+    g.set_entry_point("job_query")
+
+    if pipelined:
+        g.add_node("search_structure", search_structure_node)
+        g.add_edge("job_query", "search_structure")
+        g.add_edge("search_structure", END)
+    else:
+        g.add_node("parallel_search", parallel_search_node)
+        g.add_node("structure", structured_data_node)
+        g.add_edge("job_query", "parallel_search")
+        g.add_edge("parallel_search", "structure")
+        g.add_edge("structure", END)
+
+    return g.compile()
+
+
 # =======================
 # RUN
 # =======================
@@ -144,7 +199,7 @@ async def run_once(user_input: str):
 
     state: AppState = {
         "user_input": user_input,
-        "mode": "normal", # default
+        "mode": None, # let the router decide
         "job_urls": [],
         "jobs": [],
         "keywords": [],
@@ -155,7 +210,13 @@ async def run_once(user_input: str):
     
     print(f"🚀 STARTING WOFKLOW WITH INPUT: {user_input}")
 
-    result = await app.ainvoke(state)
+    started = time.perf_counter()
+    if STATE_AUDIT:
+        result, audit = await audit_graph(app, state)
+        log("STATE SIZE REPORT", audit.report())
+    else:
+        result = await app.ainvoke(state)
+    print(f"⏱️ Graph finished in {time.perf_counter() - started:.2f}s (speculative={SPECULATIVE_SEARCH})")
 
     print("\n✅ FINAL OUTPUT:\n")
     print(result.get("final_answer", "No answer generated."))
@@ -1,24 +1,59 @@
 import os
 import sys
 import uvicorn
+import base64
 import hashlib
+import hmac
 import json
+import time
 import asyncio
 import traceback
-from fastapi import FastAPI, HTTPException, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Body, Depends, Header
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from main import build_graph
-from config import AppState, log
+from main import build_graph, build_retrieval_graph
+from config import (
+    AppState, log, generate_job_id,
+    SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES, SEARCH_CACHE_SOFT_TTL, REFRESH_LEASE_TTL,
+    HOT_REFRESH_INTERVAL, HOT_QUERY_COUNT, POPULARITY_HALF_LIFE,
+    RESUME_CACHE_TTL, RESUME_CACHE_MAX_ENTRIES, RESUME_CACHE_MAX_BYTES,
+    SCORE_CACHE_TTL, SCORE_CACHE_MAX_ENTRIES, SCORE_CACHE_MAX_BYTES,
+    ADMIN_TOKEN, CRAWL_SESSION_TTL, CRAWL_SESSION_MAX, RANK_LLM_REASONS, RANK_LLM_TIMEOUT, STATE_AUDIT,
+)
+from components.caches import make_cache
+from components.memory_cache import LRUCache
+from components.sqlite_cache import SqliteCache
+from components.crawl_session import CrawlSession
+from components.page_cache import page_cache
+from components.extraction_cache import extraction_cache
+from components.singleflight import SingleFlight
+from components.popularity import PopularityTracker
+from components.query_key import canonical_query_key, query_key_stats
+from components.ranker import skill_scores, text_scores, combined_score, sort_by_score
+from components.state_audit import StateAudit
+from components.scrape_tiers import tier_stats
+from components.clients import io_stats
+from components.rate_limit import rate_limit_stats
+from components.router import router_stats
+from components.job_query import query_parser_stats
+from components.rate_limit import rate_limited
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
-app = FastAPI(title="PBL Client API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher = asyncio.create_task(refresh_hot_queries()) if HOT_REFRESH_INTERVAL > 0 else None
+    yield
+    if refresher:
+        refresher.cancel()
+
+app = FastAPI(title="PBL Client API", lifespan=lifespan)
 
 # Allow CORS for frontend connection
 app.add_middleware(
@@ -32,11 +67,48 @@ app.add_middleware(
 # =======================
 # CACHE
 # =======================
-# search_cache: query_key -> list of job dicts
-search_cache: Dict[str, List[Dict[str, Any]]] = {}
+# search_cache: query_key -> {"jobs": [...], "limit": int, "fetched_at": ts, "exhausted": bool}
+# (exhausted: a /jobs/search crawl session found nothing past these jobs)
+# (SEARCH_CACHE_TTL is the hard TTL, SEARCH_CACHE_SOFT_TTL triggers refreshes)
+search_cache = make_cache("search", SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES)
+
+# refresh_leases: query_key -> {"pid", "at"}; held while one worker refreshes
+# the key. Same backend as search_cache, so it is shared whenever that is.
+refresh_leases = make_cache(
+    "refresh_leases", REFRESH_LEASE_TTL,
+    default_backend="sqlite" if isinstance(search_cache, SqliteCache) else "memory",
+)
+
+# resume_cache: cache_key -> list of job dicts (ranked, with match_score / match_reason)
+resume_cache = make_cache("resume", RESUME_CACHE_TTL, RESUME_CACHE_MAX_ENTRIES, RESUME_CACHE_MAX_BYTES)
+
+# score_cache: "<profile fingerprint>:<job id>" -> {"skill_score", "reason", "by_llm"}
+# (outlives resume_cache entries: a new search reuses skill scores and LLM
+# reasons of jobs seen before; the BM25 part depends on the list, see ranker.py)
+score_cache = make_cache("scores", SCORE_CACHE_TTL, SCORE_CACHE_MAX_ENTRIES, SCORE_CACHE_MAX_BYTES)
+
+# Identical in-flight crawls / rankings are shared instead of repeated
+flights = SingleFlight()
 
-# resume_cache: cache_key -> list of job dicts (ranked)
-resume_cache: Dict[str, List[Dict[str, Any]]] = {}
+# Request counts per query key, to refresh hot queries before they go stale
+popularity = PopularityTracker(half_life=POPULARITY_HALF_LIFE)
+
+# Background refresh tasks (referenced here so they are not garbage collected)
+background_tasks: set = set()
+
+# crawl_sessions: query_key -> live CrawlSession behind /jobs/search cursors
+# (always in-process: sessions hold locks and pending work, not plain data)
+crawl_sessions = LRUCache("crawl_sessions", ttl_seconds=CRAWL_SESSION_TTL, max_entries=CRAWL_SESSION_MAX, max_bytes=0)
+
+# Every cache the admin endpoints can inspect / flush
+CACHES = {
+    "search": search_cache,
+    "refresh_leases": refresh_leases,
+    "resume": resume_cache,
+    "scores": score_cache,
+    "pages": page_cache,
+    "extractions": extraction_cache,
+}
 
 # =======================
 # MODELS
@@ -44,12 +116,12 @@ resume_cache: Dict[str, List[Dict[str, Any]]] = {}
 
 class ChatRequest(BaseModel):
     query: str
-    mode: str = "normal"  # "normal" or "job"
+    mode: Optional[str] = None  # "job" skips routing; "normal" or None lets the router decide
     limit: int = 5
 
 class ChatStreamRequest(BaseModel):
     query: str
-    mode: str = "normal"  # "normal" or "job"
+    mode: Optional[str] = None  # "job" skips routing; "normal" or None lets the router decide
     limit: int = 5
     session_id: Optional[str] = None
 
@@ -73,13 +145,15 @@ class JobCard(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     page: int = 1
-    page_size: int = 4
+    page_size: int = Field(4, gt=0)
+    cursor: Optional[str] = None  # next_cursor of the previous page; wins over page
 
 class SearchResponse(BaseModel):
     jobs: List[JobCard]
     page: int
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 class RecommendRequest(BaseModel):
     query: str
@@ -98,6 +172,13 @@ class RecommendRequest(BaseModel):
 # =======================
 graph_app = build_graph()
 
+# job_query -> search (+ structure), for the /jobs endpoints
+retrieval_app = build_retrieval_graph()
+
+# Default query behind /jobs/initial (always refreshed proactively)
+INITIAL_QUERY = "Software Engineer"
+INITIAL_LIMIT = 4
+
 llm_ranker = ChatGoogleGenerativeAI(
     model="gemini-2.5-flash",
     temperature=0.1,
@@ -105,12 +186,14 @@ llm_ranker = ChatGoogleGenerativeAI(
 )
 
 def get_query_key(query: str) -> str:
-    return query.strip().lower()
+    # Same search, different wording -> same key (see components/query_key.py)
+    return canonical_query_key(query)
 
-def get_recommend_key(req: RecommendRequest) -> str:
-    # Create a unique key based on all personal inputs
+popularity.pin(get_query_key(INITIAL_QUERY), INITIAL_QUERY)
+
+def get_profile_fingerprint(req: RecommendRequest) -> str:
+    # Everything about the candidate, nothing about the query
     key_parts = [
-        req.query.strip().lower(),
         req.resume_text or "",
         req.user_name or "",
         str(req.user_age or ""),
@@ -120,14 +203,87 @@ def get_recommend_key(req: RecommendRequest) -> str:
     raw = "|".join(key_parts)
     return hashlib.md5(raw.encode("utf-8")).hexdigest()
 
-def generate_job_id(source_url: Optional[str]) -> str:
-    if not source_url:
-        return hashlib.md5(b"unknown").hexdigest()
-    return hashlib.md5(source_url.encode("utf-8")).hexdigest()
+def get_recommend_key(req: RecommendRequest) -> str:
+    # Create a unique key based on the query and all personal inputs
+    raw = f"{get_query_key(req.query)}|{get_profile_fingerprint(req)}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+def encode_cursor(query_key: str, offset: int) -> str:
+    raw = json.dumps({"q": query_key, "o": offset}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str, query_key: str) -> int:
+    """
+    Returns the offset stored in a cursor; 400 if it is malformed or was
+    issued for a different query.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(data["o"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if data.get("q") != query_key or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor does not match query")
+    return offset
+
+async def get_crawl_session(query: str, query_key: str) -> CrawlSession:
+    session = crawl_sessions.get(query_key)
+    if session is None:
+        async def create() -> CrawlSession:
+            created = crawl_sessions.get(query_key)
+            if created is None:
+                # Resume after whatever an earlier crawl already cached
+                created = CrawlSession(query, jobs=await read_search_cache(query, query_key))
+                crawl_sessions.set(query_key, created)
+            return created
+
+        # The cache read above can yield (shared SQLite backend): concurrent
+        # first pages must still end up on ONE session, i.e. one crawl
+        session = await flights.do(f"session:{query_key}", create)
+    # (Re-)set on every use so idle sessions expire, busy ones stay
+    crawl_sessions.set(query_key, session)
+    return session
+
+# Graph nodes whose LLM tokens are forwarded to /chat/stream clients
+STREAMED_NODES = {"normal_chat", "recommendation"}
+
+# Human readable status sent when a graph node starts
+NODE_STATUS = {
+    "route": "Thinking...",
+    "job_query": "Understanding your query...",
+    "parallel_search": "Searching LinkedIn and Indeed...",
+    "structure": "Reading job postings...",
+    "search_structure": "Searching LinkedIn and Indeed and reading job postings...",
+    "recommendation": "Writing recommendations...",
+    "normal_chat": "Writing answer...",
+}
+
+async def with_heartbeat(stream, interval: float):
+    """
+    Re-yields items from an async iterator, yielding None whenever nothing
+    arrived for `interval` seconds (used to keep SSE connections alive).
+    """
+    it = stream.__aiter__()
+    pending = asyncio.ensure_future(it.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            yield item
+            pending = asyncio.ensure_future(it.__anext__())
+    finally:
+        pending.cancel()
 
 async def fetch_jobs_from_graph(query: str, limit: int = 8) -> List[Dict[str, Any]]:
     """
-    Invokes the LangGraph agent to find jobs.
+    Invokes the retrieval graph to find jobs (no routing / recommendation
+    LLM calls: only structured_data is used here).
     """
     initial_state: AppState = {
         "user_input": query,
@@ -138,12 +294,11 @@ async def fetch_jobs_from_graph(query: str, limit: int = 8) -> List[Dict[str, An
         "keywords": [],
         "location": [],
         "structured_data": {},
-        "final_answer": "",
     }
     
-    print(f"DEBUG: Invoking graph for query='{query}' limit={limit}")
+    print(f"DEBUG: Invoking retrieval graph for query='{query}' limit={limit}")
     try:
-        result = await graph_app.ainvoke(initial_state)
+        result = await retrieval_app.ainvoke(initial_state)
     except Exception as e:
         print(f"ERROR: Graph invocation failed: {e}")
         traceback.print_exc()
@@ -171,14 +326,130 @@ async def fetch_jobs_from_graph(query: str, limit: int = 8) -> List[Dict[str, An
         
     return processed_jobs
 
-async def rank_jobs(jobs: List[Dict[str, Any]], req: RecommendRequest) -> List[Dict[str, Any]]:
+async def get_search_entry(query_key: str) -> Optional[Dict[str, Any]]:
     """
-    Re-ranks jobs based on resume AND/OR personal details using LLM.
+    search_cache entry, or None once SEARCH_CACHE_TTL has passed since its
+    crawl. The backends restart their TTL on every write, and growing a list
+    rewrites the entry with its original fetched_at, so the hard TTL has to
+    be checked against fetched_at here.
     """
-    if not jobs:
-        return []
+    entry = await search_cache.aget(query_key)
+    if entry is not None and time.time() - entry["fetched_at"] > SEARCH_CACHE_TTL:
+        await search_cache.adelete(query_key)
+        return None
+    return entry
+
+async def write_search_cache(
+    query_key: str,
+    jobs: List[Dict[str, Any]],
+    limit: int,
+    fetched_at: Optional[float] = None,
+    exhausted: bool = False,
+):
+    await search_cache.aset(query_key, {
+        "jobs": jobs,
+        "limit": limit,
+        "fetched_at": fetched_at or time.time(),
+        "exhausted": exhausted,
+    })
 
-    # Construct the user profile string
+async def refresh_search(query: str, query_key: str, limit: int):
+    """
+    Re-crawls a query and replaces its search_cache entry. The old entry is
+    only replaced on success, so a failed crawl keeps serving stale jobs.
+    Workers that find the key's refresh lease taken leave it to its holder.
+    """
+    async def refresh():
+        if not await refresh_leases.aadd(query_key, {"pid": os.getpid(), "at": time.time()}):
+            log("SEARCH REFRESH SKIPPED (LEASED)", {"query": query_key})
+            return
+        # Another worker may have refreshed it since this one saw it stale
+        entry = await get_search_entry(query_key)
+        if entry is not None and time.time() - entry["fetched_at"] <= SEARCH_CACHE_SOFT_TTL:
+            await refresh_leases.adelete(query_key)
+            return
+
+        jobs = await fetch_jobs_from_graph(query, limit=limit)
+        if jobs:
+            await write_search_cache(query_key, jobs, limit)
+            # Later pages resume from the fresh list, not the old crawl
+            crawl_sessions.delete(query_key)
+            await refresh_leases.adelete(query_key)
+        log("SEARCH CACHE REFRESHED", {"query": query_key, "jobs": len(jobs)})
+
+    await flights.do(f"refresh:{query_key}", refresh)
+
+def schedule_refresh(query: str, query_key: str, limit: int):
+    task = asyncio.create_task(refresh_search(query, query_key, limit))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def read_search_entry(query: str, query_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Stale-while-revalidate read: entries past the soft TTL are returned as is
+    and refreshed in the background. Entries past the hard TTL count as a
+    miss (see get_search_entry), so the caller crawls synchronously.
+    """
+    entry = await get_search_entry(query_key)
+    if entry is None:
+        return None
+    if time.time() - entry["fetched_at"] > SEARCH_CACHE_SOFT_TTL:
+        schedule_refresh(query, query_key, entry["limit"])
+    return entry
+
+async def read_search_cache(query: str, query_key: str) -> Optional[List[Dict[str, Any]]]:
+    entry = await read_search_entry(query, query_key)
+    return entry["jobs"] if entry is not None else None
+
+async def refresh_hot_queries():
+    """
+    Background loop: keeps the most requested queries (and the /jobs/initial
+    default) fresh, so their users never wait on a crawl.
+    """
+    while True:
+        await asyncio.sleep(HOT_REFRESH_INTERVAL)
+        for query_key, query in popularity.top(HOT_QUERY_COUNT):
+            try:
+                entry = await get_search_entry(query_key)
+                if entry is None:
+                    limit = INITIAL_LIMIT if query_key == get_query_key(INITIAL_QUERY) else 12
+                elif time.time() - entry["fetched_at"] > SEARCH_CACHE_SOFT_TTL:
+                    limit = entry["limit"]
+                else:
+                    continue
+                # One at a time: this loop should not compete with live requests
+                await refresh_search(query, query_key, limit)
+            except Exception as e:
+                log("HOT QUERY REFRESH FAILED", {"query": query_key, "error": str(e)})
+
+async def get_search_jobs(query: str, query_key: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    search_cache lookup with single-flight fill: concurrent misses for the
+    same key wait on one fetch_jobs_from_graph run, and the cache is written
+    by that run before any waiter is released.
+    """
+    popularity.hit(query_key, query)
+    all_jobs = await read_search_cache(query, query_key)
+    if all_jobs is not None:
+        return all_jobs
+
+    async def load() -> List[Dict[str, Any]]:
+        # A flight that just finished may have filled the cache already
+        cached = await get_search_entry(query_key)
+        if cached is not None:
+            return cached["jobs"]
+        print("Cache miss. Fetching from graph...")
+        jobs = await fetch_jobs_from_graph(query, limit=limit)
+        if jobs:
+            await write_search_cache(query_key, jobs, limit)
+        return jobs
+
+    return await flights.do(f"search:{query_key}", load)
+
+def build_profile(req: RecommendRequest) -> str:
+    """
+    Candidate profile text from the personal details and / or resume.
+    """
     profile_str = ""
     if req.user_name:
         profile_str += f"Candidate Name: {req.user_name}\n"
@@ -191,20 +462,65 @@ async def rank_jobs(jobs: List[Dict[str, Any]], req: RecommendRequest) -> List[D
     
     if req.resume_text:
         profile_str += f"\n--- RESUME CONTENT ---\n{req.resume_text}\n"
+    return profile_str
 
-    if not profile_str.strip():
+async def rank_jobs(jobs: List[Dict[str, Any]], req: RecommendRequest) -> List[Dict[str, Any]]:
+    """
+    Re-ranks jobs based on resume AND/OR personal details, locally (no LLM):
+    skill overlap + BM25, see components/ranker.py. Skill scores and reasons
+    of jobs seen for this profile (in any earlier search) come from
+    score_cache; the BM25 part is recomputed over `jobs` every time, so all
+    jobs in one ranking are scored against the same corpus.
+    """
+    if not jobs:
+        return []
+
+    if not build_profile(req).strip():
         # No intro info provided, return original order
         return jobs
 
+    fingerprint = get_profile_fingerprint(req)
+    keys = {j["id"]: f"{fingerprint}:{j['id']}" for j in jobs}
+    cached = await score_cache.aget_many(keys.values())
+
+    profile_text = " ".join([req.experience or "", req.resume_text or ""])
+    new_jobs = [j for j in jobs if "skill_score" not in cached.get(keys[j["id"]], {})]
+    if new_jobs:
+        for job, part in zip(new_jobs, skill_scores(new_jobs, skills=req.tech_skills, profile_text=profile_text)):
+            entry = {**part, "by_llm": False}
+            cached[keys[job["id"]]] = entry
+            await score_cache.aset(keys[job["id"]], entry)
+    log("RANK JOBS", {"jobs": len(jobs), "scored": len(new_jobs), "from_cache": len(jobs) - len(new_jobs)})
+
+    ranked = []
+    texts = text_scores(jobs, skills=req.tech_skills, profile_text=profile_text)
+    for job, text_score in zip(jobs, texts):
+        entry = cached[keys[job["id"]]]
+        ranked.append({
+            **job,
+            "match_score": combined_score(entry["skill_score"], text_score),
+            "match_reason": entry["reason"],
+            "reason_by_llm": entry["by_llm"],
+        })
+    return sort_by_score(ranked)
+
+async def explain_jobs(jobs: List[Dict[str, Any]], req: RecommendRequest) -> Dict[str, str]:
+    """
+    Asks the LLM for personalised match reasons for a few (already ranked)
+    jobs. Returns {job id: reason}; empty when the LLM fails or is too slow,
+    in which case the local template reasons stay.
+    """
+    profile_str = build_profile(req)
+    if not jobs or not profile_str.strip():
+        return {}
+
     prompt_template = """
 You are an expert HR recruiter.
 I will provide a CANDIDATE PROFILE and a list of JOBS.
 The CANDIDATE PROFILE contains specific details (Name, Age, Skills, Experience) AND/OR a Resume.
 
 TASK:
-1. Analyze the Technical Skills and Experience in the profile deeply.
-2. Rank the JOBS based on how well they match the stated skills and experience.
-3. Add a "match_reason" field to each job. 
+For each job write a "match_reason".
    - The match reason MUST explicitly mention how the job fits the candidate's specific skills (e.g., "Matches your Python and React skills...") or experience.
    - If the candidate name is provided, address the candidate professionally if appropriate, or just keep it objective.
 
@@ -231,36 +547,15 @@ OUTPUT JSON (list of objects with 'id' and 'match_reason'):
         })
 
     try:
-        ranked_output = await chain.ainvoke({"profile": profile_str, "jobs_json": json.dumps(jobs_input)})
-        
-        # Create a map of id -> match_reason
-        match_map = {item.get("id"): item.get("match_reason", "Matches profile.") for item in ranked_output}
-        
-        # Create a map of id -> original job
-        job_map = {j["id"]: j for j in jobs}
-        
-        final_list = []
-        # Iterate through ranked_output to preserve order
-        for item in ranked_output:
-            jid = item.get("id")
-            if jid in job_map:
-                original_job = job_map[jid]
-                original_job["match_reason"] = match_map.get(jid)
-                final_list.append(original_job)
-                
-        # Add any remaining jobs that weren't returned by LLM (fallback) at the end
-        ranked_ids = set(match_map.keys())
-        for j in jobs:
-            if j["id"] not in ranked_ids:
-                j["match_reason"] = "Standard match."
-                final_list.append(j)
-                
-        return final_list
-        
+        async with rate_limited("gemini"):
+            output = await asyncio.wait_for(
+                chain.ainvoke({"profile": profile_str, "jobs_json": json.dumps(jobs_input)}),
+                timeout=RANK_LLM_TIMEOUT,
+            )
+        return {item["id"]: item["match_reason"] for item in output if item.get("id") and item.get("match_reason")}
     except Exception as e:
-        print(f"Ranking error: {e}")
-        traceback.print_exc()
-        return jobs
+        print(f"Match reason error: {e!r}")
+        return {}
 
 # =======================
 # ENDPOINTS
@@ -306,20 +601,22 @@ async def chat_stream_endpoint(request: ChatStreamRequest):
     """
     Streaming chat endpoint (SSE).
     Emits:
-      - event: status (Thinking..., Searching...)
-      - event: token (assistant text chunks)
-      - event: final (final JSON payload)
+      - event: status (human readable stage: Thinking..., Searching LinkedIn and Indeed...)
+      - event: node   ({"node", "status": "started"|"finished", "ms", "error"})
+      - event: urls   ({"source", "count", "ok"} once per search source)
+      - event: job    ({"job", "count", "limit"} as soon as a job is validated)
+      - event: token  (assistant text chunks, streamed from Gemini as generated)
+      - event: final  (final JSON payload)
     """
     def sse(event: str, data: str) -> str:
         # SSE supports multiple data: lines for newlines
-        lines = data.splitlines() or [""]
+        # (split, not splitlines, so a token ending in "\n" keeps it)
+        lines = data.split("\n")
         return f"event: {event}\n" + "\n".join([f"data:{line}" for line in lines]) + "\n\n"
 
     async def gen():
         try:
             yield sse("status", "Thinking...")
-            await asyncio.sleep(0.15)
-            yield sse("status", "Searching...")
 
             initial_state: AppState = {
                 "user_input": request.query,
@@ -333,24 +630,62 @@ async def chat_stream_endpoint(request: ChatStreamRequest):
                 "final_answer": "",
             }
 
-            task = asyncio.create_task(graph_app.ainvoke(initial_state))
-
-            # Keep connection alive while graph runs
-            while not task.done():
-                await asyncio.sleep(1.0)
-                yield sse("status", "Searching...")
-
-            result = await task
+            result: Dict[str, Any] = {}
+            streamed = False
+            node_started: Dict[str, float] = {}
+            audit = StateAudit() if STATE_AUDIT else None
+            finished_nodes: List[str] = []
+
+            stream = graph_app.astream(initial_state, stream_mode=["tasks", "custom", "messages", "values"])
+            async for item in with_heartbeat(stream, 5.0):
+                if item is None:
+                    # SSE comment: keeps the connection alive, ignored by clients
+                    yield ": keep-alive\n\n"
+                    continue
+
+                kind, chunk = item
+                if kind == "tasks":
+                    name = chunk.get("name")
+                    if "result" in chunk or "error" in chunk:
+                        started = node_started.pop(chunk.get("id"), None)
+                        finished_nodes.append(name)
+                        yield sse("node", json.dumps({
+                            "node": name,
+                            "status": "finished",
+                            "ms": round((time.perf_counter() - started) * 1000) if started else None,
+                            "error": str(chunk["error"]) if chunk.get("error") else None,
+                        }))
+                    else:
+                        node_started[chunk.get("id")] = time.perf_counter()
+                        yield sse("node", json.dumps({"node": name, "status": "started"}))
+                        if name in NODE_STATUS:
+                            yield sse("status", NODE_STATUS[name])
+                elif kind == "custom":
+                    if chunk.get("type") == "job":
+                        job = {**chunk["job"], "id": generate_job_id(chunk["job"].get("source_url"))}
+                        yield sse("job", json.dumps({"job": job, "count": chunk.get("count"), "limit": chunk.get("limit")}))
+                    elif chunk.get("type") == "urls":
+                        yield sse("urls", json.dumps(chunk))
+                elif kind == "messages":
+                    message, metadata = chunk
+                    if metadata.get("langgraph_node") in STREAMED_NODES:
+                        text = message.text
+                        if text:
+                            streamed = True
+                            yield sse("token", text)
+                elif kind == "values":
+                    result = chunk
+                    if audit and finished_nodes:
+                        audit.record("+".join(finished_nodes), chunk)
+                        finished_nodes = []
 
             final_answer = result.get("final_answer") or ""
             structured_data = result.get("structured_data")
             job_urls = result.get("job_urls")
 
-            # Progressive reveal (best-effort) after computation
-            chunk_size = 18
-            for i in range(0, len(final_answer), chunk_size):
-                yield sse("token", final_answer[i : i + chunk_size])
-                await asyncio.sleep(0)
+            # Answers produced without an LLM call (e.g. "no jobs found")
+            if not streamed and final_answer:
+                yield sse("token", final_answer)
 
             payload = {
                 "final_answer": final_answer,
@@ -376,38 +711,59 @@ async def chat_stream_endpoint(request: ChatStreamRequest):
 
 @app.post("/jobs/search", response_model=SearchResponse)
 async def search_jobs(request: SearchRequest):
+    """
+    Cursor-based pagination over a lazily grown crawl: each page only crawls
+    as many jobs as it needs, and the per-query CrawlSession remembers the
+    remaining URLs so the next page continues where this one stopped.
+    """
     try:
         query_key = get_query_key(request.query)
-        
-        print(f"SEARCH REQUEST: query='{request.query}' page={request.page}")
-        
-        # 1. Check Cache
-        if query_key in search_cache:
-            all_jobs = search_cache[query_key]
+        if request.cursor:
+            start = decode_cursor(request.cursor, query_key)
         else:
-            # 2. Fetch if not cached
-            print("Cache miss. Fetching from graph...")
-            all_jobs = await fetch_jobs_from_graph(request.query, limit=12)
-            if all_jobs:
-                search_cache[query_key] = all_jobs
-        
-        # 3. Pagination
-        start = (request.page - 1) * request.page_size
+            start = (request.page - 1) * request.page_size
         end = start + request.page_size
-        
-        if start >= len(all_jobs):
-            paginated_jobs = []
+
+        print(f"SEARCH REQUEST: query='{request.query}' offset={start}")
+        popularity.hit(query_key, request.query)
+
+        # 1. Serve from cache when it already covers this page, or when an
+        #    earlier crawl of it ran dry (a new one would search again)
+        entry = await read_search_entry(request.query, query_key)
+        all_jobs = entry["jobs"] if entry else []
+        exhausted = bool(entry and entry.get("exhausted"))
+        session = crawl_sessions.get(query_key)
+        if session is None and (len(all_jobs) >= end or exhausted):
+            # Unless it ran dry, the next page resumes the crawl past the list
+            has_more = len(all_jobs) > end or not exhausted
         else:
-            paginated_jobs = all_jobs[start:end]
-            
-        has_more = end < len(all_jobs)
-        
+            # 2. Otherwise crawl just enough more for this page
+            session = await get_crawl_session(request.query, query_key)
+            all_jobs = await session.ensure(end)
+            has_more = len(all_jobs) > end or session.has_more
+            entry = await get_search_entry(query_key)
+            grew = entry is None or len(all_jobs) > len(entry["jobs"])
+            ran_dry = session.exhausted and not (entry and entry.get("exhausted"))
+            if all_jobs and (grew or ran_dry):
+                # Keep the original crawl time: growing a list does not refresh it
+                await write_search_cache(
+                    query_key, list(all_jobs), len(all_jobs),
+                    fetched_at=entry["fetched_at"] if entry else None,
+                    exhausted=session.exhausted,
+                )
+
+        paginated_jobs = all_jobs[start:end]
+        has_more = has_more and bool(paginated_jobs)
+
         return SearchResponse(
             jobs=paginated_jobs,
-            page=request.page,
+            page=start // request.page_size + 1,
             page_size=request.page_size,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=encode_cursor(query_key, end) if has_more else None,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in search_jobs endpoint: {e}")
         traceback.print_exc()
@@ -422,20 +778,21 @@ async def recommend_jobs(request: RecommendRequest):
         print(f"RECOMMEND REQUEST: query='{request.query}'")
         
         # 1. Check Personalization Cache
-        if rec_key in resume_cache:
-            ranked_jobs = resume_cache[rec_key]
-        else:
-            # 2. Check Search Cache for base jobs
-            if query_key in search_cache:
-                base_jobs = search_cache[query_key]
-            else:
-                base_jobs = await fetch_jobs_from_graph(request.query, limit=12)
-                if base_jobs:
-                    search_cache[query_key] = base_jobs
-            
-            # 3. Rank
-            ranked_jobs = await rank_jobs(base_jobs, request)
-            resume_cache[rec_key] = ranked_jobs
+        ranked_jobs = await resume_cache.aget(rec_key)
+        if ranked_jobs is None:
+            async def rank() -> List[Dict[str, Any]]:
+                cached = await resume_cache.aget(rec_key)
+                if cached is not None:
+                    return cached
+                # 2. Check Search Cache for base jobs
+                base_jobs = await get_search_jobs(request.query, query_key, limit=12)
+
+                # 3. Rank (local, no LLM)
+                ranked = await rank_jobs(base_jobs, request)
+                await resume_cache.aset(rec_key, ranked)
+                return ranked
+
+            ranked_jobs = await flights.do(f"rank:{rec_key}", rank)
             
         # 4. Pagination
         start = (request.page - 1) * request.page_size
@@ -447,6 +804,33 @@ async def recommend_jobs(request: RecommendRequest):
             paginated_jobs = ranked_jobs[start:end]
             
         has_more = end < len(ranked_jobs)
+
+        # 5. LLM match reasons, only for the visible page (once per page)
+        unexplained = [j for j in paginated_jobs if not j.get("reason_by_llm")]
+        if RANK_LLM_REASONS and unexplained:
+            async def explain() -> Dict[str, str]:
+                reasons = await explain_jobs(unexplained, request)
+                fingerprint = get_profile_fingerprint(request)
+                for j in unexplained:
+                    if j.get("id") in reasons:
+                        key = f"{fingerprint}:{j['id']}"
+                        entry = await score_cache.aget(key)
+                        if entry is not None:
+                            await score_cache.aset(key, {**entry, "reason": reasons[j["id"]], "by_llm": True})
+                if reasons:
+                    updated = [
+                        {**j, "match_reason": reasons[j.get("id")], "reason_by_llm": True}
+                        if j.get("id") in reasons else j
+                        for j in ranked_jobs
+                    ]
+                    await resume_cache.aset(rec_key, updated)
+                return reasons
+
+            reasons = await flights.do(f"explain:{rec_key}:{start}", explain)
+            paginated_jobs = [
+                {**j, "match_reason": reasons[j.get("id")]} if j.get("id") in reasons else j
+                for j in paginated_jobs
+            ]
         
         return SearchResponse(
             jobs=paginated_jobs,
@@ -467,18 +851,13 @@ async def get_initial_jobs():
     """
     try:
         # Default query to fetch initial jobs
-        default_query = "Software Engineer"
-        limit = 4
+        default_query = INITIAL_QUERY
+        limit = INITIAL_LIMIT
         
         # Reuse search_jobs logic or fetch directly
         query_key = get_query_key(default_query)
         
-        if query_key in search_cache:
-            all_jobs = search_cache[query_key]
-        else:
-            all_jobs = await fetch_jobs_from_graph(default_query, limit=limit)
-            if all_jobs:
-                search_cache[query_key] = all_jobs
+        all_jobs = await get_search_jobs(default_query, query_key, limit=limit)
                 
         # Take top 3
         initial_jobs = all_jobs[:limit] if all_jobs else []
@@ -494,5 +873,49 @@ async def get_initial_jobs():
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# =======================
+# ADMIN
+# =======================
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin endpoints can flush paid-for caches: off unless ADMIN_TOKEN is
+    set, and then only with a matching X-Admin-Token header.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.get("/admin/cache", dependencies=[Depends(require_admin)])
+async def cache_stats():
+    """
+    Size / hit-rate / eviction stats for every cache, plus provider I/O,
+    rate limiter and local router / query parser counters.
+    """
+    stats = {name: await cache.astats() for name, cache in CACHES.items()}
+    stats["single_flight"] = flights.stats()
+    stats["popularity"] = popularity.stats()
+    stats["query_keys"] = query_key_stats()
+    stats["firecrawl_tiers"] = tier_stats.stats()
+    stats["io"] = io_stats()
+    stats["rate_limits"] = rate_limit_stats()
+    stats["router"] = router_stats()
+    stats["query_parser"] = query_parser_stats()
+    return stats
+
+@app.post("/admin/cache/flush", dependencies=[Depends(require_admin)])
+async def flush_cache(name: Optional[str] = None):
+    """
+    Flushes one cache (?name=search|resume|scores|pages|extractions) or all of them.
+    """
+    if name is not None and name not in CACHES:
+        raise HTTPException(status_code=404, detail=f"Unknown cache '{name}'")
+
+    names = [name] if name else list(CACHES)
+    for n in names:
+        await CACHES[n].aclear()
+    return {"flushed": names}
+
 if __name__ == "__main__":
     uvicorn.run("server:app", host="0.0.0.0", port=4000, reload=True)
@@ -0,0 +1,46 @@
+"""
+Offline check: canonical_query_key only folds spellings of the same search
+into one key, and keeps different searches (levels, counts, ignored words)
+on different keys.
+
+    python test_query_key.py   (or: pytest test_query_key.py)
+"""
+from components.query_key import canonical_query_key
+
+SAME = [
+    ("ML engineer jobs Hyderabad", "machine learning engineer in hyderabad"),
+    ("SDE jobs bangalore", "sde jobs in Bangalore"),
+]
+DIFFERENT = [
+    "sde 2 jobs in bangalore",
+    "SDE 3 jobs in Bangalore",
+    "sde-2 jobs in bangalore",
+    "SDE jobs bangalore",
+    "sde two jobs in bangalore",
+]
+
+
+def test_same_search_shares_key():
+    for a, b in SAME:
+        assert canonical_query_key(a) == canonical_query_key(b), (a, b)
+        assert canonical_query_key(a).startswith("job|"), a
+
+
+def test_levels_keep_separate_keys():
+    keys = {q: canonical_query_key(q) for q in DIFFERENT}
+    assert len(set(keys.values())) == len(DIFFERENT), keys
+    for q in DIFFERENT[:3] + DIFFERENT[4:]:
+        # The level is not in the folded key, so these must stay raw
+        assert not keys[q].startswith("job|"), (q, keys[q])
+
+
+def test_limit_is_not_a_dropped_number():
+    key = canonical_query_key("give me 5 ml engineer jobs in hyderabad")
+    assert key == "job|kw=machine learning engineer|loc=hyderabad|n=5", key
+
+
+if __name__ == "__main__":
+    test_same_search_shares_key()
+    test_levels_keep_separate_keys()
+    test_limit_is_not_a_dropped_number()
+    print("Query key check passed.")
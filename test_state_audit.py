@@ -0,0 +1,107 @@
+"""
+Offline check: runs build_graph() with stubbed nodes under a strict state
+audit and makes sure no node echoes list fields back into the operator.add
+reducers (job_urls / keywords would come out duplicated).
+
+    python test_state_audit.py   (or: pytest test_state_audit.py)
+"""
+import asyncio
+from contextlib import contextmanager
+
+import main
+import components.search as search
+
+KEYWORDS = ["Machine Learning Engineer"]
+LOCATION = ["Hyderabad"]
+LINKEDIN_URLS = ["https://www.linkedin.com/jobs/view/1", "https://www.linkedin.com/jobs/view/2"]
+INDEED_URLS = ["https://in.indeed.com/viewjob?jk=a", "https://www.linkedin.com/jobs/view/1"]
+MAX_BYTES = 16 * 1024
+
+
+async def route_and_parse_stub(state):
+    return {"mode": "job", "keywords": KEYWORDS, "location": LOCATION, "limit": 3, "query_parsed": True}
+
+
+async def route_stub(state):
+    return {"mode": "job"}
+
+
+async def job_query_stub(state):
+    return {"keywords": KEYWORDS, "location": LOCATION, "limit": 3}
+
+
+async def linkedin_stub(state):
+    return {"job_urls": LINKEDIN_URLS}
+
+
+async def indeed_stub(state):
+    return {"job_urls": INDEED_URLS}
+
+
+async def structure_urls_stub(urls, limit):
+    if not isinstance(urls, list):
+        urls = [url async for batch in urls for url in batch]
+    return [{"source_url": url} for url in dict.fromkeys(urls)][:limit]
+
+
+async def structured_data_stub(state):
+    return {"structured_data": {"jobs": await structure_urls_stub(state.get("job_urls", []), state.get("limit", 5))}}
+
+
+async def final_answer_stub(state):
+    return {"final_answer": f"{len(state['structured_data']['jobs'])} jobs"}
+
+
+STUBS = [
+    (main, "route_and_parse_node", route_and_parse_stub),
+    (main, "route_node", route_stub),
+    (main, "parse_job_query_node", job_query_stub),
+    (main, "structured_data_node", structured_data_stub),
+    (main, "final_answer_node", final_answer_stub),
+    (search, "mcp_agent_node", linkedin_stub),
+    (search, "indeed_urls_node", indeed_stub),
+    (search, "structure_urls", structure_urls_stub),
+]
+
+
+@contextmanager
+def stubbed_nodes():
+    """Swaps the network / LLM nodes for stubs and puts the originals back."""
+    originals = [(module, name, getattr(module, name)) for module, name, _ in STUBS]
+    try:
+        for module, name, stub in STUBS:
+            setattr(module, name, stub)
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+
+async def run_graph(fused_routing: bool, pipelined: bool):
+    app = main.build_graph(fused_routing=fused_routing, speculative=False, pipelined=pipelined)
+    state = {"user_input": "ml engineer jobs in hyderabad", "mode": None, "job_urls": [], "keywords": [], "location": []}
+    return await main.audit_graph(app, state, max_bytes=MAX_BYTES, strict=True)
+
+
+def test_graph_state_not_duplicated():
+    with stubbed_nodes():
+        runs = {
+            (fused_routing, pipelined): asyncio.run(run_graph(fused_routing, pipelined))
+            for fused_routing in (True, False)
+            for pipelined in (True, False)
+        }
+    assert main.route_node is not route_stub and search.structure_urls is not structure_urls_stub
+
+    for (fused_routing, pipelined), (result, audit) in runs.items():
+        variant = {"fused_routing": fused_routing, "pipelined": pipelined, "steps": audit.report()["steps"]}
+
+        assert len(result["job_urls"]) == len(set(result["job_urls"])), variant
+        assert set(result["job_urls"]) == set(LINKEDIN_URLS + INDEED_URLS), variant
+        assert result["keywords"] == KEYWORDS, variant
+        assert result["location"] == LOCATION, variant
+        assert result["final_answer"] == "3 jobs", variant
+
+
+if __name__ == "__main__":
+    test_graph_state_not_duplicated()
+    print("State audit check passed.")